@@ -0,0 +1,211 @@
+import os
+import re
+import mmap
+import uuid
+import time
+import argparse
+import threading
+from queue import Queue, Full
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from encoding import CropEncoder
+
+
+# ---------------------- Arquivo das placas em segmentos ----------------------
+# O recorte vai direto, em memória, para o OCR. A cópia arquivada é o recorte
+# do carro inteiro (dá para localizar a placa e ler de novo) e não é mais um
+# PNG por detecção: os recortes são acrescentados a um arquivo
+# de segmento por hora (ou por dia), "<segmento>.seg", e cada um ganha uma
+# linha "id offset tamanho extensão" em "<segmento>.idx". O id do evento começa pelo
+# segmento e termina num uuid, então nunca colide (duas detecções no mesmo
+# segundo não se sobrescrevem) e a leitura vai direto ao segmento certo,
+# usando mmap. Backup e limpeza copiam/apagam poucos arquivos grandes.
+# A codificação roda no pool do CropEncoder (formato configurável) e uma
+# thread própria grava os bytes na ordem de chegada, sem atrasar o OCR; com a
+# fila cheia (disco lento) a gravação é descartada em vez de segurar o worker.
+SEGMENT_FORMATS = {
+    "hour": "%Y%m%d-%H",
+    "day": "%Y%m%d",
+}
+EVENT_ID = re.compile(r"^(\d{8}(?:-\d{2})?)-[0-9a-f]{32}$")
+
+
+def segment_of(event_id):
+    match = EVENT_ID.match(event_id)
+    if not match:
+        raise ValueError(f"Id de evento inválido: {event_id}")
+    return match.group(1)
+
+
+class SegmentArchive:
+    def __init__(self, directory, segment="hour", encoder=None, max_pending=64):
+        if segment not in SEGMENT_FORMATS:
+            raise ValueError(f"Segmento do arquivo desconhecido: {segment}")
+        self.directory = directory
+        self.segment_format = SEGMENT_FORMATS[segment]
+        self.encoder = encoder or CropEncoder()
+        os.makedirs(directory, exist_ok=True)
+        self.queue = Queue(maxsize=max_pending)
+        self.dropped = 0
+        self.current = None  # (segmento, arquivo .seg, arquivo .idx) aberto para escrita
+        self.index_cache = {}  # segmento -> (mtime do .idx, {id: (offset, tamanho)})
+        self.thread = threading.Thread(target=self._run, name="archive", daemon=True)
+        self.thread.start()
+
+    def new_id(self, captured_at=None):
+        when = datetime.fromtimestamp(captured_at if captured_at is not None else time.time())
+        return f"{when.strftime(self.segment_format)}-{uuid.uuid4().hex}"
+
+    def _paths(self, segment):
+        base = os.path.join(self.directory, segment)
+        return base + ".seg", base + ".idx"
+
+    # ---- escrita (thread do arquivo) ----
+    def write(self, event_id, image):
+        # Pode ser chamado por vários workers de OCR ao mesmo tempo: nunca bloqueia
+        if self.queue.full():
+            self._drop(event_id)
+            return
+        # Codifica em paralelo; a thread de gravação espera cada resultado na ordem
+        future = self.encoder.submit(image)
+        try:
+            self.queue.put_nowait((event_id, self.encoder.ext, future))
+        except Full:
+            future.cancel()
+            self._drop(event_id)
+
+    def _drop(self, event_id):
+        self.dropped += 1
+        print(f"[DEBUG] Arquivo: fila cheia, {event_id} não foi gravado")
+
+    def _open_segment(self, segment):
+        if self.current is not None:
+            if self.current[0] == segment:
+                return self.current
+            self._close_segment()
+        seg_path, idx_path = self._paths(segment)
+        self.current = (segment, open(seg_path, "ab"), open(idx_path, "a", encoding="ascii"))
+        return self.current
+
+    def _close_segment(self):
+        if self.current is not None:
+            self.current[1].close()
+            self.current[2].close()
+            self.current = None
+
+    def _append(self, event_id, data, ext):
+        _, seg_file, idx_file = self._open_segment(segment_of(event_id))
+        offset = seg_file.seek(0, os.SEEK_END)
+        seg_file.write(data)
+        seg_file.flush()
+        # A linha do índice só aparece depois dos bytes: quem lê o índice sempre acha o recorte inteiro
+        idx_file.write(f"{event_id} {offset} {len(data)} {ext}\n")
+        idx_file.flush()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            event_id, ext, future = item
+            try:
+                self._append(event_id, future.result(), ext)
+            except Exception as e:
+                print(f"[DEBUG] Arquivo: erro ao gravar {event_id} ({e})")
+        self._close_segment()
+
+    def close(self):
+        # Grava o que ainda está na fila antes de encerrar
+        self.queue.put(None)
+        self.thread.join()
+        self.encoder.close()
+
+    # ---- leitura ----
+    def _index(self, segment, reload=False):
+        _, idx_path = self._paths(segment)
+        mtime = os.path.getmtime(idx_path)
+        cached = self.index_cache.get(segment)
+        if cached is not None and cached[0] == mtime and not reload:
+            return cached[1]
+        entries = {}
+        with open(idx_path, "r", encoding="ascii", errors="replace") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 4:  # linha cortada por queda de energia é ignorada
+                    entries[parts[0]] = (int(parts[1]), int(parts[2]), parts[3])
+        self.index_cache[segment] = (mtime, entries)
+        return entries
+
+    def read_bytes(self, event_id):
+        segment = segment_of(event_id)
+        entry = self._index(segment).get(event_id)
+        if entry is None:
+            # O índice pode ter crescido sem mudar o mtime (resolução do sistema de arquivos)
+            entry = self._index(segment, reload=True).get(event_id)
+        if entry is None:
+            raise KeyError(event_id)
+        offset, length, _ = entry
+        seg_path, _ = self._paths(segment)
+        with open(seg_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return mapped[offset:offset + length]
+
+    def read(self, event_id):
+        data = np.frombuffer(self.read_bytes(event_id), dtype=np.uint8)
+        return cv2.imdecode(data, cv2.IMREAD_UNCHANGED)
+
+    # ---- retenção ----
+    def segments(self):
+        return sorted(name[:-4] for name in os.listdir(self.directory) if name.endswith(".seg"))
+
+    def purge(self, older_than_days):
+        # Apaga segmentos inteiros mais velhos que o limite; devolve quantos foram apagados
+        limit = datetime.now().timestamp() - older_than_days * 86400
+        removed = 0
+        for segment in self.segments():
+            started = datetime.strptime(segment, SEGMENT_FORMATS["hour" if "-" in segment else "day"])
+            if started.timestamp() >= limit or (self.current and self.current[0] == segment):
+                continue
+            for path in self._paths(segment):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.index_cache.pop(segment, None)
+            removed += 1
+        return removed
+# ------------------------------------------------------------------------------
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recortes arquivados em segmentos")
+    parser.add_argument("--dir", default="placas_detectadas", help="diretório dos segmentos")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    extract = sub.add_parser("extrair", help="grava o recorte de um evento num arquivo de imagem")
+    extract.add_argument("id")
+    extract.add_argument("-o", "--saida", help="arquivo de saída (padrão: <id>.png)")
+    sub.add_parser("segmentos", help="lista os segmentos com quantidade e tamanho")
+    purge = sub.add_parser("limpar", help="apaga segmentos antigos")
+    purge.add_argument("--dias", type=float, required=True, help="mantém só os últimos N dias")
+    args = parser.parse_args()
+
+    # Só leitura/limpeza: a thread de escrita fica parada
+    archive = SegmentArchive(args.dir)
+    if args.comando == "extrair":
+        ext = archive._index(segment_of(args.id)).get(args.id, (0, 0, ".png"))[2]
+        output = args.saida or f"{args.id}{ext}"
+        with open(output, "wb") as f:
+            f.write(archive.read_bytes(args.id))
+        print(f"{args.id} -> {output}")
+    elif args.comando == "segmentos":
+        for segment in archive.segments():
+            seg_path, _ = archive._paths(segment)
+            print(f"{segment}  {len(archive._index(segment)):>7} recortes  "
+                  f"{os.path.getsize(seg_path) / 1e6:8.1f} MB")
+    else:
+        print(f"{archive.purge(args.dias)} segmento(s) apagado(s)")
+    archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import os
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+from archive import SegmentArchive
+from encoding import encode
+
+
+# Benchmark dos formatos de arquivo dos recortes. Para cada formato mede,
+# sobre recortes já arquivados: tempo médio de codificação, tamanho médio e,
+# com o Tesseract, se a placa lida na imagem decodificada continua igual à
+# lida no recorte original (sem perda).
+DEFAULT_SPECS = ["png:1", "png:3", "png:6", "png:9", "jpeg:95", "jpeg:85", "jpeg:70",
+                 "webp:101", "webp:90", "webp:75"]
+
+
+def load_from_archive(directory, limit):
+    archive = SegmentArchive(directory)
+    images = []
+    for segment in reversed(archive.segments()):
+        for event_id in archive._index(segment):
+            images.append(archive.read(event_id))
+            if len(images) >= limit:
+                archive.close()
+                return images
+    archive.close()
+    return images
+
+
+def load_from_folder(directory, limit):
+    images = []
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith((".png", ".jpg", ".jpeg", ".webp", ".bmp")):
+            image = cv2.imread(os.path.join(directory, name), cv2.IMREAD_UNCHANGED)
+            if image is not None:
+                images.append(image)
+            if len(images) >= limit:
+                break
+    return images
+
+
+def read_plates(ocr, images):
+    from ocr import encontrar_placa
+
+    futures = [ocr.submit(image) for image in images]
+    return [encontrar_placa(future.result()) for future in futures]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara formatos de codificação dos recortes")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--arquivo", help="diretório de segmentos (archive.py)")
+    source.add_argument("--imagens", help="diretório com imagens soltas (ex.: PNGs antigos)")
+    parser.add_argument("--limite", type=int, default=300, help="quantidade máxima de recortes")
+    parser.add_argument("--formatos", nargs="+", default=DEFAULT_SPECS, help="ex.: png:3 jpeg:85 webp:90")
+    parser.add_argument("--sem-ocr", action="store_true", help="mede só tempo e tamanho")
+    parser.add_argument("--ocr-workers", type=int, default=4)
+    args = parser.parse_args()
+
+    if args.arquivo:
+        images = load_from_archive(args.arquivo, args.limite)
+    else:
+        images = load_from_folder(args.imagens, args.limite)
+    if not images:
+        raise SystemExit("Nenhum recorte encontrado")
+    print(f"{len(images)} recortes, {np.mean([img.shape[0] * img.shape[1] for img in images]):.0f} px em média\n")
+
+    ocr = None
+    baseline = None
+    if not args.sem_ocr:
+        from ocr import TesseractOCR
+
+        ocr = TesseractOCR(workers=args.ocr_workers, timeout=30.0)
+        baseline = read_plates(ocr, images)
+        print(f"Placas lidas nos originais: {sum(p is not None for p in baseline)}/{len(images)}\n")
+
+    header = f"{'formato':<10} {'ms/recorte':>10} {'KB médio':>9} {'total MB':>9}"
+    if ocr is not None:
+        header += f" {'iguais':>8} {'lidas':>6}"
+    print(header)
+    for spec in args.formatos:
+        sizes = []
+        decoded = []
+        start = time.perf_counter()
+        encoded = [encode(image, spec) for image in images]
+        elapsed = (time.perf_counter() - start) * 1000.0 / len(images)
+        for data in encoded:
+            sizes.append(len(data))
+            if ocr is not None:
+                decoded.append(cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED))
+        line = f"{spec:<10} {elapsed:>10.2f} {np.mean(sizes) / 1024:>9.1f} {sum(sizes) / 1e6:>9.2f}"
+        if ocr is not None:
+            plates = read_plates(ocr, decoded)
+            read = [b for b in baseline if b is not None]
+            same = sum(1 for b, p in zip(baseline, plates) if b is not None and b == p)
+            agreement = 100.0 * same / len(read) if read else 0.0
+            line += f" {agreement:>7.1f}% {sum(p is not None for p in plates):>6}"
+        print(line)
+
+    if ocr is not None:
+        ocr.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import os
+import shutil
+import tempfile
+import threading
+from queue import Queue
+from contextlib import contextmanager
+
+# ---------------------- Selenium Imports ----------------------
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+from webdriver_manager.chrome import ChromeDriverManager
+# --------------------------------------------------------------
+
+from ocr import HORARIO_PATTERN, encontrar_placa
+
+# ---------------------- Funções Selenium (Extração de Placa) ----------------------
+BING_URL = "https://www.bing.com/visualsearch"
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def _chromedriver_path():
+    # ChromeDriverManager().install() consulta a rede: resolve uma vez por processo
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+        return _driver_path
+
+
+def setup_driver(headless=False):
+    options = Options()
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--window-size=1920,1080")
+    # Evitar detecção de automação
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option("useAutomationExtension", False)
+
+    # Criar um diretório de perfil temporário para evitar conflito
+    temp_profile = tempfile.mkdtemp()
+    options.add_argument(f"--user-data-dir={temp_profile}")
+
+    service = Service(_chromedriver_path())
+    driver = webdriver.Chrome(service=service, options=options)
+    driver.temp_profile = temp_profile
+    return driver
+
+
+def close_driver(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
+    shutil.rmtree(getattr(driver, "temp_profile", ""), ignore_errors=True)
+
+
+def open_visual_search(driver, wait_timeout):
+    # Carrega a página e espera a área de colagem aparecer, em vez de dormir um tempo fixo
+    driver.get(BING_URL)
+    WebDriverWait(driver, wait_timeout).until(EC.presence_of_element_located((By.ID, "vsk_pastearea")))
+
+    # Aceita o cookie (se aparecer)
+    for button in driver.find_elements(By.XPATH, "//a[contains(text(),'Aceitar')]"):
+        try:
+            button.click()
+        except Exception:
+            pass
+        break
+# --------------------------------------------------------------------------------
+
+
+# ---------------------- Pool de navegadores aquecidos ----------------------
+# Abrir o Chrome (e baixar/validar o chromedriver) a cada placa custa vários
+# segundos. O pool abre as sessões uma vez, já na página do Bing, e as
+# reaproveita. Antes de entregar uma sessão confere se ela responde; sessão
+# travada, com erro ou usada demais é fechada e recriada.
+# Cada vaga do pool sempre volta para a fila: se o Chrome não abre, volta
+# vazia (None) e a sessão é criada na próxima retirada, em vez de a vaga
+# sumir e as leituras seguintes ficarem esperando uma sessão que não existe.
+class DriverPool:
+    def __init__(self, size=1, headless=False, wait_timeout=15.0, max_uses=200):
+        self.size = size
+        self.headless = headless
+        self.wait_timeout = wait_timeout
+        self.max_uses = max_uses
+        self.idle = Queue()
+        for _ in range(size):
+            try:
+                self.idle.put(self._new_session())
+            except Exception as e:
+                print(f"[DEBUG] Bing: não foi possível abrir o navegador ({e})")
+                self.idle.put(None)
+
+    def _new_session(self):
+        driver = setup_driver(self.headless)
+        try:
+            if not self.headless:
+                driver.maximize_window()
+            open_visual_search(driver, self.wait_timeout)
+        except Exception as e:
+            print(f"[DEBUG] Bing: página não carregou ao aquecer a sessão ({e})")
+        driver.uses = 0
+        return driver
+
+    def _healthy(self, driver):
+        try:
+            driver.current_url  # qualquer comando falha se o Chrome morreu
+            return driver.uses < self.max_uses
+        except Exception:
+            return False
+
+    @contextmanager
+    def session(self, timeout=None):
+        driver = self.idle.get(timeout=timeout)
+        try:
+            if driver is not None and not self._healthy(driver):
+                print("[DEBUG] Bing: sessão do navegador reciclada")
+                close_driver(driver)
+                driver = None
+            if driver is None:
+                driver = self._new_session()
+        except Exception:
+            self.idle.put(None)  # a vaga volta vazia; a próxima retirada tenta de novo
+            raise
+        broken = False
+        try:
+            yield driver
+        except Exception:
+            broken = True
+            raise
+        finally:
+            driver.uses += 1
+            if broken:
+                # Recriar aqui poderia falhar e perder a vaga: fica para a próxima retirada
+                close_driver(driver)
+                driver = None
+            self.idle.put(driver)
+
+    def close(self):
+        while not self.idle.empty():
+            driver = self.idle.get_nowait()
+            if driver is not None:
+                close_driver(driver)
+# ---------------------------------------------------------------------------
+
+
+# ---------------------- Extração de placa via Bing ----------------------
+# A imagem é enviada pelo input de arquivo da página (como no project-test/index.js)
+# e o texto reconhecido é lido direto do DOM. Sem área de transferência, cada
+# sessão do pool é independente e várias podem rodar ao mesmo tempo, inclusive
+# em modo headless num servidor Linux.
+FILE_INPUT_SELECTOR = 'input[type="file"]'
+TEXT_TAB_XPATH = "//span[contains(text(),'Texto')]"
+COPY_BUTTON_XPATH = "//div[contains(@class, 'text_copy_btn')]"
+
+# O painel de texto não tem um id estável: partindo do botão "Copiar texto",
+# sobe até o primeiro ancestral que tenha texto além do próprio botão
+_PANEL_TEXT_JS = """
+let node = arguments[0];
+const own = (node.innerText || '').trim();
+while (node.parentElement) {
+    node = node.parentElement;
+    const text = (node.innerText || '').trim();
+    if (text && text !== own) {
+        return own ? text.split(own).join(' ').trim() : text;
+    }
+}
+return '';
+"""
+
+
+def read_recognized_text(driver, wait, text_xpath=None):
+    if text_xpath:
+        element = wait.until(EC.presence_of_element_located((By.XPATH, text_xpath)))
+        return wait.until(lambda d: element.text.strip() or False)
+    button = wait.until(EC.presence_of_element_located((By.XPATH, COPY_BUTTON_XPATH)))
+    return wait.until(lambda d: (d.execute_script(_PANEL_TEXT_JS, button) or "").strip() or False)
+
+
+def extract_text_bing(image_path, driver, wait_timeout=15.0, tentativas_max=3, text_xpath=None):
+    wait = WebDriverWait(driver, wait_timeout)
+    image_path = os.path.abspath(image_path)
+    tentativas = 0  # Contador de tentativas
+    while tentativas < tentativas_max:
+        tentativas += 1
+
+        # Acessa o Bing Visual Search
+        open_visual_search(driver, wait_timeout)
+
+        # Envia a imagem pelo input de arquivo
+        upload = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, FILE_INPUT_SELECTOR)))
+        upload.send_keys(image_path)
+
+        # Espera a aba que mostra o resultado do OCR ficar disponível e clica nela
+        try:
+            wait.until(EC.element_to_be_clickable((By.XPATH, TEXT_TAB_XPATH))).click()
+        except TimeoutException:
+            print("Não foi possível clicar na aba de texto/OCR. Tentando novamente...")
+            continue
+
+        # Lê o texto reconhecido direto da página
+        try:
+            text = read_recognized_text(driver, wait, text_xpath)
+        except TimeoutException:
+            print("Texto reconhecido não apareceu na página. Tentando novamente...")
+            continue
+        print("Texto reconhecido pelo Bing:", text)
+
+        # Verifica se o texto contém um horário no formato "dd/mm/yyyy hh mm ss"
+        if HORARIO_PATTERN.search(text):
+            print("Horário encontrado no texto da placa. Ignorando esta placa e passando para a próxima imagem.")
+            return None
+
+        placa = encontrar_placa(text)
+        if placa:
+            return placa
+        print("Nenhuma placa válida encontrada. Tentando novamente...")
+
+    print("Número máximo de tentativas atingido. Ignorando esta imagem.")
+    return None  # Retorna None se não encontrar uma placa válida após as tentativas
+# ------------------------------------------------------------------------
@@ -0,0 +1,167 @@
+import time
+import threading
+
+import cv2
+import numpy as np
+
+from frame_ring import SharedCameraStream
+from motion import MotionDetector
+from detector import roi_rect, RoiMask
+from tracker import VehicleTracker
+
+
+# ---------------------- Classe para captura de stream ----------------------
+class CameraStream:
+    def __init__(self, rtsp_url, camera_name, frame_width=1280, frame_height=720):
+        self.rtsp_url = rtsp_url
+        self.camera_name = camera_name
+        self.cap = cv2.VideoCapture(self.rtsp_url, cv2.CAP_FFMPEG)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, frame_width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, frame_height)
+        if not self.cap.isOpened():
+            print(f"[ERRO] Falha ao abrir {self.camera_name}")
+        self.frame = None
+        self.seq = 0  # frames recebidos; 0 = ainda sem frame
+        self.placeholder = None
+        self.running = True
+        self.lock = threading.Lock()
+        self.fail_count = 0
+        self.thread = threading.Thread(target=self.update, daemon=True)
+        self.thread.start()
+
+    def update(self):
+        while self.running:
+            ret, frame = self.cap.read()
+            if ret:
+                with self.lock:
+                    self.frame = frame
+                    self.seq += 1
+                self.fail_count = 0
+            else:
+                self.fail_count += 1
+                print(f"[DEBUG] {self.camera_name}: Falha na captura ({self.fail_count}/5)")
+                self.cap.release()
+                time.sleep(2)
+                self.cap = cv2.VideoCapture(self.rtsp_url, cv2.CAP_FFMPEG)
+                if self.fail_count >= 5:
+                    print(f"[DEBUG] {self.camera_name}: Tentando reconexão...")
+
+    def read(self):
+        with self.lock:
+            if self.frame is not None:
+                return self.frame.copy()
+            else:
+                placeholder = np.zeros((720, 1280, 3), dtype=np.uint8)
+                cv2.putText(placeholder, f"Sem conexão {self.camera_name}", (50, 50),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+                return placeholder
+
+    def read_latest(self):
+        # Sem cópia: cap.read() aloca um array novo a cada frame e a thread só troca
+        # a referência, então o frame devolvido nunca é sobrescrito. Quem chama não
+        # deve desenhar nele (o loop principal desenha numa cópia só para exibição).
+        with self.lock:
+            if self.frame is not None:
+                return self.frame, self.seq
+        if self.placeholder is None:
+            self.placeholder = self.read()
+        return self.placeholder, 0
+
+    def is_valid(self, seq):
+        return True
+
+    def snapshot(self, frame, seq):
+        # O frame já é só nosso (cap.read() aloca um novo a cada leitura)
+        return frame
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+        self.cap.release()
+# --------------------------------------------------------------------------
+
+
+# ---------------------- Registro de câmeras ----------------------
+class Camera:
+    # Uma entrada do arquivo de configuração: stream, ROI e estado de detecção
+    def __init__(self, entry, inference_size=640, tracker_config=None):
+        self.number = entry["number"]
+        self.label = entry["name"]
+        self.window = f"Video - {self.label}"
+        self.display = entry["display"]
+        self.ocr_priority = entry["ocr_priority"]  # maior = atendida antes na fila de OCR
+        self.roi = np.array(entry["roi"], dtype=np.int32)
+        self.last_inference_time = 0  # última vez que o YOLO rodou nesta câmera
+        self.last_seq = None
+        self.inference_size = inference_size
+        self.roi_test = entry["roi_test"]
+        self.roi_min_overlap = entry["roi_min_overlap"]
+        self.rect = None
+        self.roi_mask = None
+        self.rect_shape = None
+        self.motion_pending = False
+        motion = entry["motion"]
+        self.motion_min_interval = motion["min_interval"]
+        tracker_config = tracker_config or {}
+        self.track_interval = tracker_config.get("update_interval", 0.5)
+        self.tracker = VehicleTracker(tracker_config.get("iou_threshold", 0.3),
+                                      tracker_config.get("max_age", 2.0),
+                                      tracker_config.get("min_hits", 2),
+                                      tracker_config.get("max_duration", 30.0),
+                                      tracker_config.get("top_k", 3))
+        self.motion = None
+        if motion["enabled"]:
+            self.motion = MotionDetector(self.roi, motion["width"],
+                                         motion["pixel_threshold"], motion["min_area"])
+        if entry["capture_mode"] == "process":
+            self.stream = SharedCameraStream(entry["rtsp_url"], self.label,
+                                             entry["frame_width"], entry["frame_height"],
+                                             entry["ring_slots"])
+        else:
+            self.stream = CameraStream(entry["rtsp_url"], self.label,
+                                       entry["frame_width"], entry["frame_height"])
+
+    def detection_due(self, frame, seq, current_time, detection_interval):
+        # Acumula movimento até a próxima inferência (no modo thread o mesmo
+        # frame pode ser lido mais de uma vez e não deve apagar o movimento)
+        if self.motion is not None and (seq != self.last_seq or seq == 0):
+            self.motion_pending |= self.motion.update(frame)
+        self.last_seq = seq
+
+        elapsed = current_time - self.last_inference_time
+        if self.motion is None or elapsed >= detection_interval:
+            return True
+        # Com veículo rastreado no ROI continua detectando (mesmo parado) para
+        # a trilha não se perder e o carro não ser enviado de novo
+        if self.tracker.has_active_tracks() and elapsed >= self.track_interval:
+            return True
+        return self.motion_pending and elapsed >= self.motion_min_interval
+
+    def inference_rect(self, frame):
+        # Retângulo do ROI recortado para o modelo e a máscara do ROI na
+        # resolução do modelo, recalculados só se o tamanho do frame mudar
+        if frame.shape != self.rect_shape:
+            self.rect = roi_rect(self.roi, frame.shape)
+            self.roi_mask = RoiMask(self.roi, self.rect, self.inference_size,
+                                    self.roi_test, self.roi_min_overlap)
+            self.rect_shape = frame.shape
+        return self.rect
+
+    def mark_inference(self, current_time):
+        self.last_inference_time = current_time
+        self.motion_pending = False
+
+    def stop(self):
+        self.stream.stop()
+
+
+def build_cameras(config):
+    cameras = [Camera(entry, config["inference_size"], config["tracker"]) for entry in config["cameras"]]
+    for cam in cameras:
+        cam.display = cam.display and config["display"]
+        if cam.display:
+            cv2.namedWindow(cam.window, cv2.WINDOW_NORMAL)
+            cv2.resizeWindow(cam.window, 1280, 720)
+    return cameras
+# -----------------------------------------------------------------
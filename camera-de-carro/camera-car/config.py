@@ -0,0 +1,181 @@
+import json
+import copy
+
+# ---------------------- Configuração padrão ----------------------
+# Valores usados quando a chave não aparece no arquivo de configuração.
+# Cada câmera do arquivo herda "camera_defaults" e sobrescreve o que precisar.
+DEFAULT_CONFIG = {
+    "detection_interval": 5,  # segundos entre detecções por câmera
+    "display": True,  # abre uma janela por câmera com o ROI desenhado
+    "inference_size": 640,  # o ROI recortado é ajustado (letterbox) para este tamanho
+    "detector": {
+        # "onnx": ONNX Runtime em CPU com o modelo local em "weights" (sem rede)
+        # "torch": torch.hub (baixa código e pesos do GitHub se não estiverem em cache)
+        "backend": "torch",
+        "weights": "modelos/yolov5s.onnx",
+        "conf": 0.4,  # confiança mínima
+        "iou": 0.45,  # IoU do NMS (backend onnx; o torch usa o padrão do hub)
+        "classes": [2],  # classes COCO aceitas (2 = carro)
+        "threads": 0,  # threads do ONNX Runtime (0 = automático)
+        "warmup": 2,  # inferências de aquecimento na inicialização
+        "torch_repo": "ultralytics/yolov5",
+        "torch_source": "github",  # "local" para um clone do yolov5 em torch_repo
+    },
+    "ocr": {
+        # Backends tentados em ordem até um devolver placa válida:
+        # "tesseract" (local), "express" (serviço do project-test), "ocrspace", "bing" (Selenium)
+        "chain": ["tesseract"],
+        # Segundos de espera antes de disparar o próximo backend em paralelo (None = só em falha)
+        "hedge_after": None,
+        # Veículos lidos ao mesmo tempo (threads do worker de OCR); None = quantas chamadas
+        # simultâneas o primeiro backend aceita (ex.: bing.pool_size, tesseract.workers)
+        "workers": None,
+        # Confiança mínima da placa (1.0 = formato exato; cada caractere corrigido tira 0.15)
+        "min_confidence": 0.6,
+        # Leitura com essa confiança encerra o veículo; abaixo disso tenta o próximo
+        # recorte e, no fim, junta as leituras por votação caractere a caractere
+        "accept_confidence": 0.9,
+        # Fila entre as câmeras e o OCR: limitada, com prioridade por câmera ("ocr_priority")
+        # e política quando cheia: "drop_oldest" ou "drop_lowest_quality"
+        "queue": {
+            "maxsize": 32,
+            "policy": "drop_oldest",
+        },
+        # Reaproveita leituras de recortes quase iguais (hash perceptual + distância de Hamming)
+        "cache": {
+            "enabled": True,
+            "max_entries": 512,
+            "ttl": 600.0,  # segundos
+            "max_distance": 16,  # bits diferentes (de 256) para considerar o mesmo recorte
+            "path": None,  # ex.: "ocr_cache.json" para manter o cache entre reinícios
+        },
+        "backends": {
+            "tesseract": {
+                "workers": 2,  # processos do pool de OCR
+                "lang": "por",
+                "tessdata_dir": None,  # None = pasta project-test, que já traz o por.traineddata
+                "psm": 7,  # uma única linha de texto
+                "cmd": None,  # caminho do executável tesseract, se não estiver no PATH
+                "timeout": 5.0,
+            },
+            "express": {"url": "http://localhost:8082/ocr", "max_concurrency": 5, "timeout": 15.0},
+            "ocrspace": {"api_key": None, "max_concurrency": 1, "timeout": 15.0},
+            "bing": {
+                "pool_size": 2,  # navegadores abertos e reaproveitados (leituras em paralelo)
+                "headless": True,
+                "text_xpath": None,  # XPath do texto reconhecido; None = painel do botão "Copiar texto"
+                "wait_timeout": 15.0,  # espera máxima por cada elemento da página
+                "max_uses": 200,  # recicla a sessão depois de tantas placas
+                "timeout": 60.0,
+            },
+        },
+    },
+    "preprocess": {
+        "profile": "fast",  # "fast" (cinza + CLAHE + unsharp) ou "quality" (denoise NL-means, lento)
+        "log_timings": False,  # mostra o tempo de cada etapa no console
+    },
+    # Recorta só a placa dentro do carro antes do pré-processamento e do OCR
+    "plate_locator": {
+        "enabled": True,
+        "method": "morphology",  # "morphology" (fileira de caracteres, sem modelo) ou "onnx" (detector de placas)
+        "weights": None,  # modelo ONNX de placas, usado só com method "onnx"
+        "conf": 0.3,
+        "size": 320,  # entrada do detector de placas
+    },
+    # Cada veículo recebe uma trilha e só o melhor recorte da trilha vai para o OCR
+    "tracker": {
+        "iou_threshold": 0.3,  # IoU mínimo entre a posição prevista e a caixa detectada
+        "max_age": 2.0,  # segundos sem ser visto para a trilha terminar
+        "min_hits": 2,  # detecções mínimas para considerar um veículo de verdade
+        "max_duration": 30.0,  # envia mesmo sem sair do ROI (carro parado na cancela)
+        "update_interval": 0.5,  # segundos entre inferências enquanto houver trilha ativa
+        "top_k": 3,  # recortes guardados por veículo (nitidez x altura); o OCR começa pelo melhor
+    },
+    # Recortes arquivados em arquivos de segmento ("hour" ou "day") com índice por id de evento;
+    # "python archive.py extrair <id>" recupera um recorte, "limpar --dias N" apaga os antigos
+    "archive": {
+        "dir": "placas_detectadas",
+        "segment": "hour",
+        # "png:0-9" (compressão), "jpeg:1-100" ou "webp:1-100" (qualidade); compare com bench_encoding.py
+        "format": "png:3",
+        "encode_workers": 2,  # threads de codificação
+    },
+    # Banco SQLite (WAL) com uma linha por veículo enviado ao OCR; gravação em lotes numa thread
+    "storage": {
+        "path": "registros.db",
+        "batch_size": 100,
+        "flush_interval": 1.0,  # segundos máximos até um evento ir para o banco
+    },
+    # Buffers pré-alocados para os recortes dos veículos (só o recorte passa para o OCR)
+    "crop_pool": {
+        "buffers": 32,
+        "max_width": 960,  # recorte maior que isso usa uma alocação comum
+        "max_height": 720,
+        "margin": 0.1,  # fração da caixa acrescentada em cada lado
+    },
+    "camera_defaults": {
+        "frame_width": 1920,
+        "frame_height": 1080,
+        "display": True,
+        "ocr_priority": 0,  # maior = placas desta câmera passam na frente na fila de OCR (ex.: entrada)
+        # "thread": captura numa thread do próprio processo (frame entregue sem cópia)
+        # "process": captura em outro processo publicando num anel de memória compartilhada
+        "capture_mode": "thread",
+        "ring_slots": 8,
+        # "center": o centro da caixa precisa estar no ROI
+        # "overlap": pelo menos roi_min_overlap da área da caixa precisa estar no ROI
+        "roi_test": "center",
+        "roi_min_overlap": 0.5,
+        # Só roda o YOLO quando há movimento no ROI; sem movimento, a
+        # detecção ainda roda a cada "detection_interval" como garantia
+        "motion": {
+            "enabled": True,
+            "width": 320,  # largura do frame reduzido usado na comparação
+            "pixel_threshold": 25,  # diferença mínima de intensidade por pixel
+            "min_area": 0.01,  # fração do ROI que precisa mudar
+            "min_interval": 0.2,  # segundos mínimos entre inferências disparadas por movimento
+        },
+    },
+    "cameras": [],
+}
+# -----------------------------------------------------------------
+
+
+def _merge(base, override):
+    # Mescla dicionários recursivamente sem alterar o padrão
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_config(path="config.json"):
+    with open(path, "r", encoding="utf-8") as f:
+        config = _merge(DEFAULT_CONFIG, json.load(f))
+
+    cameras = []
+    numbers = set()
+    for index, entry in enumerate(config["cameras"], start=1):
+        cam = _merge(config["camera_defaults"], entry)
+        cam.setdefault("number", index)
+        cam.setdefault("name", f"Cam {cam['number']}")
+        if "rtsp_url" not in cam:
+            raise ValueError(f"Câmera '{cam['name']}' sem 'rtsp_url' em {path}")
+        if len(cam.get("roi", [])) < 3:
+            raise ValueError(f"Câmera '{cam['name']}' precisa de um 'roi' com pelo menos 3 pontos em {path}")
+        if cam["capture_mode"] not in ("thread", "process"):
+            raise ValueError(f"Câmera '{cam['name']}' com capture_mode inválido: {cam['capture_mode']}")
+        if cam["roi_test"] not in ("center", "overlap"):
+            raise ValueError(f"Câmera '{cam['name']}' com roi_test inválido: {cam['roi_test']}")
+        if cam["number"] in numbers:
+            raise ValueError(f"Número de câmera duplicado em {path}: {cam['number']}")
+        numbers.add(cam["number"])
+        cameras.append(cam)
+
+    if not cameras:
+        raise ValueError(f"Nenhuma câmera configurada em {path}")
+    config["cameras"] = cameras
+    return config
@@ -0,0 +1,67 @@
+import threading
+
+import numpy as np
+
+
+# ---------------------- Recortes em buffers reaproveitados ----------------------
+# O loop das câmeras recorta o veículo (com margem) direto do frame mais
+# recente para um buffer pré-alocado. Só esse recorte pequeno passa para a
+# fila e o worker de OCR, que devolve o buffer ao pool quando termina. Com o
+# pool vazio ou um recorte maior que os buffers, cai numa alocação comum.
+class PooledCrop:
+    __slots__ = ("image", "box", "_pool", "_buffer")
+
+    def __init__(self, image, box, pool=None, buffer=None):
+        self.image = image
+        self.box = box  # (x1, y1, x2, y2) do recorte no frame, já com a margem
+        self._pool = pool
+        self._buffer = buffer
+
+    def release(self):
+        # Devolve o buffer; o recorte não pode mais ser usado depois disso
+        if self._pool is not None:
+            self._pool._give_back(self._buffer)
+        self._pool = self._buffer = self.image = None
+
+
+class CropPool:
+    def __init__(self, buffers=32, max_width=960, max_height=720, margin=0.1):
+        self.max_width = max_width
+        self.max_height = max_height
+        self.margin = margin
+        self.free = [np.empty((max_height, max_width, 3), dtype=np.uint8) for _ in range(buffers)]
+        self.lock = threading.Lock()
+        self.misses = 0  # recortes que não couberam no pool
+
+    def _take(self):
+        with self.lock:
+            return self.free.pop() if self.free else None
+
+    def _give_back(self, buffer):
+        with self.lock:
+            self.free.append(buffer)
+
+    def crop(self, frame, box):
+        x1, y1, x2, y2 = box
+        frame_h, frame_w = frame.shape[:2]
+        mx = int((x2 - x1) * self.margin)
+        my = int((y2 - y1) * self.margin)
+        x1, y1 = max(0, x1 - mx), max(0, y1 - my)
+        x2, y2 = min(frame_w, x2 + mx), min(frame_h, y2 + my)
+        source = frame[y1:y2, x1:x2]
+        h, w = source.shape[:2]
+
+        buffer = None
+        if h <= self.max_height and w <= self.max_width and source.ndim == 3 and source.shape[2] == 3:
+            buffer = self._take()
+        if buffer is None:
+            self.misses += 1
+            return PooledCrop(source.copy(), (x1, y1, x2, y2))
+        image = buffer[:h, :w]
+        np.copyto(image, source)
+        return PooledCrop(image, (x1, y1, x2, y2), self, buffer)
+
+    def available(self):
+        with self.lock:
+            return len(self.free)
+# --------------------------------------------------------------------------------
@@ -0,0 +1,237 @@
+import os
+
+import cv2
+import numpy as np
+
+
+# ---------------------- Entrada do modelo recortada no ROI ----------------------
+# Em vez de reduzir o frame inteiro (1920x1080 -> 640x480, distorcendo a
+# proporção), o modelo recebe só o retângulo que envolve o ROI, redimensionado
+# mantendo a proporção e completado com borda cinza até o tamanho do modelo.
+# A transformação guardada permite levar as caixas de volta ao frame original.
+def roi_rect(roi, frame_shape):
+    x, y, w, h = cv2.boundingRect(np.asarray(roi, dtype=np.int32))
+    frame_h, frame_w = frame_shape[:2]
+    x1, y1 = max(0, x), max(0, y)
+    x2, y2 = min(frame_w, x + w), min(frame_h, y + h)
+    if x2 <= x1 or y2 <= y1:
+        # ROI fora do frame (ex.: placeholder menor): usa o frame inteiro
+        return 0, 0, frame_w, frame_h
+    return x1, y1, x2, y2
+
+
+def _letterbox_params(h, w, size):
+    ratio = min(size / h, size / w)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+    return ratio, new_w, new_h, (size - new_w) // 2, (size - new_h) // 2
+
+
+def letterbox(img, size=640, color=(114, 114, 114)):
+    h, w = img.shape[:2]
+    ratio, new_w, new_h, pad_x, pad_y = _letterbox_params(h, w, size)
+    interpolation = cv2.INTER_AREA if ratio < 1 else cv2.INTER_LINEAR
+    resized = cv2.resize(img, (new_w, new_h), interpolation=interpolation)
+    padded = cv2.copyMakeBorder(resized, pad_y, size - new_h - pad_y, pad_x, size - new_w - pad_x,
+                                cv2.BORDER_CONSTANT, value=color)
+    return padded, ratio, (pad_x, pad_y)
+
+
+def input_transform(rect, size=640):
+    # Mesma transformação que prepare_input aplica, calculada só a partir do retângulo
+    x1, y1, x2, y2 = rect
+    ratio, _, _, pad_x, pad_y = _letterbox_params(y2 - y1, x2 - x1, size)
+    return ratio, pad_x, pad_y, x1, y1
+
+
+def prepare_input(frame, rect, size=640):
+    # Devolve a imagem RGB pronta para o modelo e a transformação para voltar ao frame
+    x1, y1, x2, y2 = rect
+    crop = frame[y1:y2, x1:x2]
+    padded, ratio, (pad_x, pad_y) = letterbox(crop, size)
+    image = cv2.cvtColor(padded, cv2.COLOR_BGR2RGB)
+    return image, (ratio, pad_x, pad_y, x1, y1)
+
+
+def to_frame_coords(boxes, transform):
+    # boxes: array (N, 4) em x1, y1, x2, y2 na entrada do modelo
+    ratio, pad_x, pad_y, off_x, off_y = transform
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    mapped = np.empty_like(boxes)
+    mapped[:, [0, 2]] = (boxes[:, [0, 2]] - pad_x) / ratio + off_x
+    mapped[:, [1, 3]] = (boxes[:, [1, 3]] - pad_y) / ratio + off_y
+    return mapped
+# ---------------------------------------------------------------------------------
+
+
+# ---------------------- Pós-processamento vetorizado ----------------------
+def filter_detections(preds, classes=(2,), conf=0.4):
+    # preds: tensor (ou array) (N, 6) em x1, y1, x2, y2, conf, classe.
+    # Filtra classe e confiança de uma vez e só então traz para a CPU/NumPy.
+    if hasattr(preds, "cpu"):
+        keep = preds[:, 4] > conf
+        class_keep = preds[:, 5] == classes[0]
+        for cls in classes[1:]:
+            class_keep |= preds[:, 5] == cls
+        return preds[keep & class_keep].cpu().numpy()
+    preds = np.asarray(preds, dtype=np.float32).reshape(-1, 6)
+    keep = (preds[:, 4] > conf) & np.isin(preds[:, 5], classes)
+    return preds[keep]
+
+
+class RoiMask:
+    # Máscara do ROI na resolução de entrada do modelo, calculada uma vez por
+    # câmera. O teste de pertinência vira consulta em array para todas as
+    # caixas: "center" olha o pixel do centro, "overlap" usa a imagem integral
+    # para medir a fração da área da caixa que cai dentro do ROI.
+    def __init__(self, roi, rect, size=640, mode="center", min_overlap=0.5):
+        if mode not in ("center", "overlap"):
+            raise ValueError(f"roi_test inválido: {mode}")
+        self.mode = mode
+        self.min_overlap = min_overlap
+        self.size = size
+        self.transform = input_transform(rect, size)
+        ratio, pad_x, pad_y, off_x, off_y = self.transform
+        points = np.asarray(roi, dtype=np.float32)
+        points = (points - (off_x, off_y)) * ratio + (pad_x, pad_y)
+        self.mask = np.zeros((size, size), dtype=np.uint8)
+        cv2.fillPoly(self.mask, [np.round(points).astype(np.int32)], 1)
+        self.integral = cv2.integral(self.mask)
+
+    def contains(self, boxes):
+        # boxes: array (N, 4) nas coordenadas de entrada do modelo
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        last = self.size - 1
+        if self.mode == "center":
+            cx = np.clip(((boxes[:, 0] + boxes[:, 2]) / 2).astype(np.int32), 0, last)
+            cy = np.clip(((boxes[:, 1] + boxes[:, 3]) / 2).astype(np.int32), 0, last)
+            return self.mask[cy, cx] > 0
+
+        x1 = np.clip(boxes[:, 0].astype(np.int32), 0, self.size)
+        y1 = np.clip(boxes[:, 1].astype(np.int32), 0, self.size)
+        x2 = np.clip(np.ceil(boxes[:, 2]).astype(np.int32), 0, self.size)
+        y2 = np.clip(np.ceil(boxes[:, 3]).astype(np.int32), 0, self.size)
+        integral = self.integral
+        inside = integral[y2, x2] - integral[y1, x2] - integral[y2, x1] + integral[y1, x1]
+        area = np.maximum((x2 - x1) * (y2 - y1), 1)
+        return inside / area >= self.min_overlap
+# --------------------------------------------------------------------------
+
+
+# ---------------------- Backends de detecção ----------------------
+# Todos recebem uma lista de imagens RGB já no tamanho do modelo (saída de
+# prepare_input) e devolvem, para cada imagem, as caixas (N, 6) em
+# x1, y1, x2, y2, conf, classe nas coordenadas dessa entrada.
+class TorchHubDetector:
+    def __init__(self, conf=0.4, classes=(2,), size=640, weights=None,
+                 repo="ultralytics/yolov5", source="github"):
+        import torch
+
+        if weights:
+            self.model = torch.hub.load(repo, "custom", path=weights, source=source)
+        else:
+            self.model = torch.hub.load(repo, "yolov5s", source=source)
+        self.model.conf = conf
+        self.model.classes = list(classes)  # o NMS já descarta as outras classes
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.model.to(device)
+        self.size = size
+
+    def detect(self, images):
+        results = self.model(images, size=self.size)
+        return list(results.xyxy)
+
+
+class OnnxDetector:
+    # yolov5s exportado para ONNX (export.py --include onnx, de preferência com
+    # --dynamic para aceitar lote) rodando no ONNX Runtime em CPU. Não baixa
+    # nada da rede: só precisa do arquivo local de pesos.
+    def __init__(self, weights, conf=0.4, classes=(2,), size=640, iou=0.45,
+                 threads=0, warmup=2):
+        import onnxruntime as ort
+
+        if not os.path.exists(weights):
+            raise FileNotFoundError(
+                f"Modelo ONNX não encontrado em {weights}. Exporte com o repositório do yolov5: "
+                f"python export.py --weights yolov5s.pt --include onnx --dynamic --imgsz {size}")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.inter_op_num_threads = 1
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(weights, options, providers=["CPUExecutionProvider"])
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_dtype = np.float16 if model_input.type == "tensor(float16)" else np.float32
+        # Modelo exportado sem --dynamic aceita um lote fixo (normalmente 1)
+        batch = model_input.shape[0]
+        self.fixed_batch = batch if isinstance(batch, int) else None
+        self.conf = conf
+        self.classes = np.asarray(classes)
+        self.iou = iou
+        self.size = size
+
+        # Aquecimento: a primeira execução aloca buffers e escolhe kernels
+        dummy = np.zeros((size, size, 3), dtype=np.uint8)
+        for _ in range(warmup):
+            self.detect([dummy])
+
+    def _run(self, images):
+        blob = np.stack(images).transpose(0, 3, 1, 2)
+        blob = np.ascontiguousarray(blob, dtype=self.input_dtype) / self.input_dtype(255)
+        return self.session.run(None, {self.input_name: blob})[0]
+
+    def detect(self, images):
+        if self.fixed_batch and len(images) != self.fixed_batch:
+            outputs = [self._run(images[i:i + self.fixed_batch])
+                       for i in range(0, len(images), self.fixed_batch)]
+            outputs = np.concatenate(outputs)
+        else:
+            outputs = self._run(images)
+        return [self._postprocess(pred.astype(np.float32)) for pred in outputs]
+
+    def _postprocess(self, pred):
+        # pred: (N, 5 + classes) em cx, cy, w, h, objectness, scores por classe
+        pred = pred[pred[:, 4] > self.conf]
+        if len(pred) == 0:
+            return np.zeros((0, 6), dtype=np.float32)
+        scores = pred[:, 5:] * pred[:, 4:5]
+        cls = scores.argmax(axis=1)
+        conf = scores[np.arange(len(scores)), cls]
+        keep = (conf > self.conf) & np.isin(cls, self.classes)
+        pred, cls, conf = pred[keep], cls[keep], conf[keep]
+        if len(pred) == 0:
+            return np.zeros((0, 6), dtype=np.float32)
+
+        boxes = np.empty((len(pred), 4), dtype=np.float32)
+        boxes[:, :2] = pred[:, :2] - pred[:, 2:4] / 2
+        boxes[:, 2:] = pred[:, :2] + pred[:, 2:4] / 2
+        # NMS por classe num único passo deslocando as caixas de cada classe
+        offset = cls[:, None].astype(np.float32) * (self.size * 2)
+        shifted = boxes + offset
+        xywh = np.concatenate([shifted[:, :2], shifted[:, 2:] - shifted[:, :2]], axis=1)
+        idx = cv2.dnn.NMSBoxes(xywh.tolist(), conf.tolist(), self.conf, self.iou)
+        idx = np.asarray(idx, dtype=np.int64).reshape(-1)
+        idx = idx[np.argsort(-conf[idx])]
+        return np.concatenate([boxes[idx], conf[idx, None], cls[idx, None].astype(np.float32)], axis=1)
+
+
+def build_detector(detector_config, size=640):
+    backend = detector_config["backend"]
+    if backend == "onnx" and not os.path.exists(detector_config["weights"]):
+        # Checkout novo ainda sem o modelo exportado: roda com o torch.hub em vez de não subir
+        print(f"[DEBUG] Modelo ONNX não encontrado em {detector_config['weights']}; usando o backend torch. "
+              f"Para exportar: python export.py --weights yolov5s.pt --include onnx --dynamic --imgsz {size}")
+        backend = "torch"
+    if backend == "onnx":
+        return OnnxDetector(detector_config["weights"], detector_config["conf"],
+                            detector_config["classes"], size, detector_config["iou"],
+                            detector_config["threads"], detector_config["warmup"])
+    if backend == "torch":
+        return TorchHubDetector(detector_config["conf"], detector_config["classes"], size,
+                                detector_config.get("torch_weights"),
+                                detector_config["torch_repo"], detector_config["torch_source"])
+    raise ValueError(f"Backend de detecção desconhecido: {backend}")
+# ------------------------------------------------------------------
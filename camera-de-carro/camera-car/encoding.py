@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+
+# ---------------------- Codificação dos recortes arquivados ----------------------
+# Formato escolhido no config.json ("archive.format") como "formato:nível":
+#   "png:0".."png:9"    sem perda; nível = compressão (mais alto = menor e mais lento)
+#   "jpeg:1".."jpeg:100" com perda; nível = qualidade
+#   "webp:1".."webp:100" com perda; "webp:101" = sem perda
+# A codificação roda num pool de threads (o OpenCV solta o GIL durante o
+# imencode), fora do worker de OCR.
+FORMATS = {
+    "png": (".png", cv2.IMWRITE_PNG_COMPRESSION, 3),
+    "jpeg": (".jpg", cv2.IMWRITE_JPEG_QUALITY, 90),
+    "webp": (".webp", cv2.IMWRITE_WEBP_QUALITY, 90),
+}
+
+
+def parse_spec(spec):
+    # "jpeg:85" -> (".jpg", [cv2.IMWRITE_JPEG_QUALITY, 85])
+    name, _, level = spec.partition(":")
+    if name not in FORMATS:
+        raise ValueError(f"Formato de imagem desconhecido: {spec}")
+    ext, flag, default = FORMATS[name]
+    return ext, [flag, int(level) if level else default]
+
+
+def encode(image, spec="png:3"):
+    ext, params = parse_spec(spec)
+    ok, encoded = cv2.imencode(ext, image, params)
+    if not ok:
+        raise ValueError(f"Falha ao codificar a imagem em {spec}")
+    return encoded.tobytes()
+
+
+class CropEncoder:
+    def __init__(self, spec="png:3", workers=2):
+        self.spec = spec
+        self.ext, _ = parse_spec(spec)  # valida o formato já na criação
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="encode")
+
+    def submit(self, image):
+        # Future com os bytes codificados
+        return self.pool.submit(encode, image, self.spec)
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+# ----------------------------------------------------------------------------------
@@ -0,0 +1,164 @@
+import time
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+
+# ---------------------- Anel de frames em memória compartilhada ----------------------
+# Layout do bloco: cabeçalho int64 [seq_escrito, seq_slot_0 ... seq_slot_n-1]
+# seguido de n slots de frames BGR uint8 do mesmo tamanho.
+# O processo de captura escreve sempre no slot seq % n: marca o slot como -1,
+# decodifica direto nele e só então publica o seq. Quem lê pega o seq mais
+# recente e usa o slot sem copiar no que é rápido (movimento, exibição); o
+# frame que vai para a detecção é copiado (SharedCameraStream.snapshot) e
+# conferido com is_valid(seq) depois da cópia.
+class FrameRing:
+    def __init__(self, shape, slots=8, name=None, create=True):
+        self.shape = tuple(shape)
+        self.slots = slots
+        frame_bytes = int(np.prod(self.shape))
+        header_bytes = 8 * (slots + 1)
+        if create:
+            self.shm = shared_memory.SharedMemory(create=True, size=header_bytes + frame_bytes * slots)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self.header = np.ndarray((slots + 1,), dtype=np.int64, buffer=self.shm.buf)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8,
+                                 buffer=self.shm.buf, offset=header_bytes)
+        if create:
+            self.header[:] = -1
+
+    # ------------- lado da captura -------------
+    def begin_write(self, seq):
+        slot = seq % self.slots
+        self.header[1 + slot] = -1
+        return self.frames[slot]
+
+    def commit(self, seq):
+        self.header[1 + seq % self.slots] = seq
+        self.header[0] = seq
+
+    # ------------- lado da detecção -------------
+    def latest(self):
+        seq = int(self.header[0])
+        if seq < 0:
+            return None, -1
+        slot = seq % self.slots
+        if self.header[1 + slot] != seq:
+            return None, -1
+        return self.frames[slot], seq
+
+    def is_valid(self, seq):
+        return seq >= 0 and self.header[1 + seq % self.slots] == seq
+
+    def close(self):
+        # Solta as views antes de fechar o bloco
+        self.header = None
+        self.frames = None
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+# -------------------------------------------------------------------------------------
+
+
+# ---------------------- Processo de captura ----------------------
+def capture_process(rtsp_url, camera_name, ring_name, shape, slots, stop_event):
+    ring = FrameRing(shape, slots, name=ring_name, create=False)
+    height, width = shape[:2]
+    cap = cv2.VideoCapture(rtsp_url, cv2.CAP_FFMPEG)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    if not cap.isOpened():
+        print(f"[ERRO] Falha ao abrir {camera_name}")
+    seq = 0
+    fail_count = 0
+    warned_size = False
+    try:
+        while not stop_event.is_set():
+            slot = ring.begin_write(seq)
+            # Decodifica direto no slot quando o tamanho bate com o configurado
+            ret, frame = cap.read(slot)
+            if ret:
+                if frame is not slot:
+                    if frame.shape != slot.shape:
+                        if not warned_size:
+                            print(f"[DEBUG] {camera_name}: stream em {frame.shape[1]}x{frame.shape[0]}, "
+                                  f"redimensionando para {width}x{height}")
+                            warned_size = True
+                        cv2.resize(frame, (width, height), dst=slot)
+                    else:
+                        slot[:] = frame
+                ring.commit(seq)
+                seq += 1
+                fail_count = 0
+            else:
+                fail_count += 1
+                print(f"[DEBUG] {camera_name}: Falha na captura ({fail_count}/5)")
+                cap.release()
+                time.sleep(2)
+                cap = cv2.VideoCapture(rtsp_url, cv2.CAP_FFMPEG)
+                if fail_count >= 5:
+                    print(f"[DEBUG] {camera_name}: Tentando reconexão...")
+    finally:
+        cap.release()
+        ring.close()
+# -----------------------------------------------------------------
+
+
+# ---------------------- Stream em processo separado ----------------------
+class SharedCameraStream:
+    # Mesma interface do CameraStream, mas a decodificação roda em outro
+    # processo e read() devolve uma view do anel (sem cópia, somente leitura)
+    def __init__(self, rtsp_url, camera_name, frame_width=1920, frame_height=1080, slots=8):
+        self.rtsp_url = rtsp_url
+        self.camera_name = camera_name
+        self.ring = FrameRing((frame_height, frame_width, 3), slots)
+        self.stop_event = mp.Event()
+        self.process = mp.Process(
+            target=capture_process,
+            args=(rtsp_url, camera_name, self.ring.name, self.ring.shape, slots, self.stop_event),
+            name=f"captura-{camera_name}",
+            daemon=True,
+        )
+        self.process.start()
+        self.placeholder = np.zeros(self.ring.shape, dtype=np.uint8)
+        self.snapshot_buffer = None  # reaproveitado: cada snapshot é usado até o próximo loop
+        cv2.putText(self.placeholder, f"Sem conexão {camera_name}", (50, 50),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+
+    def read_latest(self):
+        frame, seq = self.ring.latest()
+        if frame is None:
+            return self.placeholder, -1
+        return frame, seq
+
+    def read(self):
+        return self.read_latest()[0]
+
+    def is_valid(self, seq):
+        return self.ring.is_valid(seq)
+
+    def snapshot(self, frame, seq):
+        # Cópia privada de um frame do anel para a detecção. O slot vive só
+        # alguns quadros (ring_slots / fps) e a inferência em lote de várias
+        # câmeras pode demorar mais que isso: recortar da view depois dela
+        # perderia os recortes. Copia e só então confere o seq (seqlock);
+        # None se a captura sobrescreveu o slot durante a cópia.
+        if self.snapshot_buffer is None or self.snapshot_buffer.shape != frame.shape:
+            self.snapshot_buffer = np.empty_like(frame)
+        np.copyto(self.snapshot_buffer, frame)
+        if seq >= 0 and not self.ring.is_valid(seq):
+            return None
+        return self.snapshot_buffer
+
+    def stop(self):
+        self.stop_event.set()
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.ring.close()
+        self.ring.unlink()
+# -------------------------------------------------------------------------
@@ -0,0 +1,50 @@
+import cv2
+import numpy as np
+
+
+# ---------------------- Detector de movimento no ROI ----------------------
+# Diferença entre frames consecutivos numa versão reduzida e em tons de cinza,
+# considerando só os pixels dentro do ROI. Serve para decidir se vale a pena
+# rodar o YOLO: com a pista vazia o custo é um resize e algumas operações em 320px.
+class MotionDetector:
+    def __init__(self, roi, width=320, pixel_threshold=25, min_area=0.01):
+        self.roi = np.asarray(roi, dtype=np.float32)
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.min_area = min_area  # fração do ROI que precisa mudar
+        self.frame_shape = None
+        self.mask = None
+        self.mask_area = 0
+        self.prev = None
+        self.last_ratio = 0.0
+
+    def _prepare(self, shape):
+        # Recalcula a máscara quando o tamanho do frame muda (ex.: placeholder sem conexão)
+        h, w = shape[:2]
+        scale = self.width / w
+        self.size = (self.width, max(1, int(round(h * scale))))
+        self.mask = np.zeros((self.size[1], self.size[0]), dtype=np.uint8)
+        cv2.fillPoly(self.mask, [np.round(self.roi * scale).astype(np.int32)], 255)
+        self.mask_area = max(1, cv2.countNonZero(self.mask))
+        self.frame_shape = shape
+        self.prev = None
+
+    def update(self, frame):
+        if frame.shape != self.frame_shape:
+            self._prepare(frame.shape)
+
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+
+        prev, self.prev = self.prev, gray
+        if prev is None:
+            self.last_ratio = 0.0
+            return False
+
+        diff = cv2.absdiff(gray, prev)
+        _, moving = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+        moving = cv2.bitwise_and(moving, self.mask)
+        self.last_ratio = cv2.countNonZero(moving) / self.mask_area
+        return self.last_ratio >= self.min_area
+# --------------------------------------------------------------------------
@@ -0,0 +1,311 @@
+import os
+import re
+import base64
+import tempfile
+import time
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import cv2
+import requests
+
+from plate_parser import parse_plate
+
+
+# ---------------------- Extração da placa a partir do texto do OCR ----------------------
+# Carimbo de data/hora da câmera no formato "dd/mm/yyyy hh mm ss"
+HORARIO_PATTERN = re.compile(r'\b\d{2}/\d{2}/\d{4} \d{2} \d{2} \d{2}\b')
+
+
+def ler_placa(texto, min_confidence=0.6):
+    # PlateMatch da placa no formato antigo (AAA9999) ou Mercosul (AAA9A99),
+    # com as confusões típicas do OCR já corrigidas; ver plate_parser
+    if not texto or HORARIO_PATTERN.search(texto):
+        return None
+    match = parse_plate(texto)
+    if match is None or match.confidence < min_confidence:
+        return None
+    return match
+
+
+def encontrar_placa(texto, min_confidence=0.6):
+    match = ler_placa(texto, min_confidence)
+    return match.plate if match else None
+# ----------------------------------------------------------------------------------------
+
+
+# ---------------------- OCR local com Tesseract ----------------------
+# Usa o modelo em português que já acompanha o projeto (project-test/por.traineddata)
+# e limita os caracteres aos de placa. Roda num pool de processos para não
+# disputar o GIL com a detecção e para ler várias placas ao mesmo tempo.
+PLATE_WHITELIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+DEFAULT_TESSDATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "project-test")
+
+_tesseract_config = None
+
+
+def _init_tesseract(tesseract_cmd, tessdata_dir, psm):
+    global _tesseract_config
+    import pytesseract
+
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    _tesseract_config = (f'--tessdata-dir "{os.path.abspath(tessdata_dir)}" --psm {psm} '
+                         f'-c tessedit_char_whitelist={PLATE_WHITELIST}')
+
+
+def _tesseract_read(image, lang):
+    import pytesseract
+
+    return pytesseract.image_to_string(image, lang=lang, config=_tesseract_config)
+
+
+class TesseractOCR:
+    def __init__(self, workers=2, lang="por", tessdata_dir=DEFAULT_TESSDATA_DIR, psm=7,
+                 tesseract_cmd=None, timeout=5.0):
+        self.lang = lang
+        self.timeout = timeout
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_tesseract,
+                                        initargs=(tesseract_cmd, tessdata_dir, psm))
+
+    def submit(self, image):
+        return self.pool.submit(_tesseract_read, image, self.lang)
+
+    def read(self, image):
+        # Devolve o texto bruto reconhecido na imagem (array do OpenCV)
+        return self.submit(image).result(timeout=self.timeout)
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+# ---------------------------------------------------------------------
+
+
+# ---------------------- Backends de OCR ----------------------
+# Todos expõem read(image) e devolvem o texto reconhecido (ou a placa, no
+# caso do Bing, que já faz a própria extração). "image" é o recorte processado
+# em memória; nenhum backend depende do arquivo gravado em placas_detectadas.
+# Cada backend tem um limite de chamadas simultâneas e um timeout próprios.
+class OCRBackendBusy(Exception):
+    pass
+
+
+class OCRBackend:
+    name = "base"
+
+    def __init__(self, max_concurrency=1, timeout=10.0):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+
+    def read(self, image):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+def _encode_png(image):
+    ok, encoded = cv2.imencode(".png", image)
+    if not ok:
+        raise ValueError("Falha ao codificar a imagem em PNG")
+    return encoded.tobytes()
+
+
+class TesseractBackend(OCRBackend):
+    name = "tesseract"
+
+    def __init__(self, workers=2, lang="por", tessdata_dir=None, psm=7, cmd=None,
+                 max_concurrency=None, timeout=5.0):
+        super().__init__(max_concurrency or workers, timeout)
+        self.ocr = TesseractOCR(workers, lang, tessdata_dir or DEFAULT_TESSDATA_DIR, psm, cmd, timeout)
+
+    def read(self, image):
+        return self.ocr.read(image)
+
+    def close(self):
+        self.ocr.close()
+
+
+class ExpressBackend(OCRBackend):
+    # Serviço Node do project-test (index.js): POST /ocr com a imagem em base64
+    name = "express"
+
+    def __init__(self, url="http://localhost:8082/ocr", max_concurrency=5, timeout=15.0):
+        super().__init__(max_concurrency, timeout)
+        self.url = url
+        self.session = requests.Session()
+
+    def read(self, image):
+        payload = {"imageBase64": base64.b64encode(_encode_png(image)).decode("utf-8")}
+        response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return " ".join(response.json().get("placas", []))
+
+
+class OcrSpaceBackend(OCRBackend):
+    name = "ocrspace"
+
+    def __init__(self, api_key=None, url="https://api.ocr.space/parse/image",
+                 max_concurrency=1, timeout=15.0):
+        super().__init__(max_concurrency, timeout)
+        self.api_key = api_key or os.environ.get("OCR_SPACE_API_KEY")
+        if not self.api_key:
+            raise ValueError("OCR.space sem api_key (config ou variável OCR_SPACE_API_KEY)")
+        self.url = url
+        self.session = requests.Session()
+
+    def read(self, image):
+        files = {"image": ("placa.png", _encode_png(image), "image/png")}
+        response = self.session.post(self.url, files=files, data={"apikey": self.api_key},
+                                     timeout=self.timeout)
+        response.raise_for_status()
+        results = response.json().get("ParsedResults") or []
+        return results[0].get("ParsedText", "") if results else ""
+
+
+class BingBackend(OCRBackend):
+    # Bing Visual Search via Selenium, com sessões de navegador reaproveitadas.
+    # Sem área de transferência: cada sessão do pool atende uma placa em paralelo.
+    name = "bing"
+
+    def __init__(self, pool_size=1, headless=False, wait_timeout=15.0, max_uses=200,
+                 text_xpath=None, max_concurrency=None, timeout=60.0):
+        super().__init__(max_concurrency or pool_size, timeout)
+        from browser_ocr import DriverPool, extract_text_bing
+
+        self.extract_text_bing = extract_text_bing
+        self.wait_timeout = wait_timeout
+        self.text_xpath = text_xpath
+        self.pool = DriverPool(pool_size, headless, wait_timeout, max_uses)
+
+    def read(self, image):
+        # O upload do Bing precisa de um arquivo: PNG temporário só para esta leitura
+        fd, path = tempfile.mkstemp(suffix=".png", prefix="placa_")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_encode_png(image))
+            with self.pool.session(timeout=self.timeout) as driver:
+                return self.extract_text_bing(path, driver, self.wait_timeout,
+                                              text_xpath=self.text_xpath) or ""
+        finally:
+            os.remove(path)
+
+    def close(self):
+        self.pool.close()
+
+
+BACKENDS = {
+    "tesseract": TesseractBackend,
+    "express": ExpressBackend,
+    "ocrspace": OcrSpaceBackend,
+    "bing": BingBackend,
+}
+# -------------------------------------------------------------
+
+
+# ---------------------- Cadeia de backends ----------------------
+# Tenta os backends na ordem configurada até um devolver uma placa válida.
+# Backend ocupado (limite de concorrência atingido) é pulado na hora. Com
+# "hedge_after" o próximo backend é disparado se o atual não respondeu dentro
+# desse orçamento, e vale a primeira placa válida que chegar.
+class OCRChain:
+    def __init__(self, backends, parse=ler_placa, hedge_after=None):
+        if not backends:
+            raise ValueError("Nenhum backend de OCR configurado")
+        self.backends = backends
+        self.parse = parse
+        self.hedge_after = hedge_after
+        workers = sum(backend.max_concurrency for backend in backends) + 1
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr")
+
+    @property
+    def concurrency(self):
+        # Leituras simultâneas que o primeiro backend da cadeia atende
+        return self.backends[0].max_concurrency
+
+    def _call(self, backend, image):
+        if not backend.slots.acquire(blocking=False):
+            raise OCRBackendBusy(backend.name)
+        try:
+            text = backend.read(image)
+        finally:
+            backend.slots.release()
+        return backend.name, self.parse(text)
+
+    def read(self, image):
+        # Devolve (PlateMatch, nome do backend) ou (None, None)
+        if self.hedge_after is None:
+            return self._read_sequential(image)
+        return self._read_hedged(image)
+
+    def _read_sequential(self, image):
+        for backend in self.backends:
+            future = self.executor.submit(self._call, backend, image)
+            try:
+                name, placa = future.result(timeout=backend.timeout)
+            except FutureTimeoutError:
+                print(f"[DEBUG] OCR {backend.name}: sem resposta em {backend.timeout}s, tentando o próximo")
+                continue
+            except OCRBackendBusy:
+                print(f"[DEBUG] OCR {backend.name}: ocupado, tentando o próximo")
+                continue
+            except Exception as e:
+                print(f"[DEBUG] OCR {backend.name}: erro ({e}), tentando o próximo")
+                continue
+            if placa:
+                return placa, name
+        return None, None
+
+    def _read_hedged(self, image):
+        pending = {}
+        remaining = list(self.backends)
+        deadline = time.monotonic()
+        launch_next = True
+        while remaining or pending:
+            if launch_next and remaining:
+                backend = remaining.pop(0)
+                pending[self.executor.submit(self._call, backend, image)] = backend
+                deadline = max(deadline, time.monotonic() + backend.timeout)
+                launch_next = False
+
+            budget = self.hedge_after if remaining else deadline - time.monotonic()
+            done, _ = wait(pending, timeout=max(0.0, budget), return_when=FIRST_COMPLETED)
+            if not done:
+                if not remaining:
+                    # Orçamento total estourado; as chamadas em andamento terminam sozinhas
+                    break
+                # O backend atual não respondeu dentro do orçamento: dispara o próximo em paralelo
+                print(f"[DEBUG] OCR: sem resposta em {self.hedge_after}s, disparando {remaining[0].name}")
+                launch_next = True
+                continue
+
+            for future in done:
+                backend = pending.pop(future)
+                try:
+                    name, placa = future.result()
+                except Exception as e:
+                    print(f"[DEBUG] OCR {backend.name}: {type(e).__name__} ({e})")
+                    placa = None
+                if placa:
+                    return placa, name
+                # Falhou ou não trouxe placa válida: segue para o próximo sem esperar
+                launch_next = True
+        return None, None
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for backend in self.backends:
+            backend.close()
+
+
+def build_ocr_chain(ocr_config):
+    backends = []
+    for name in ocr_config["chain"]:
+        if name not in BACKENDS:
+            raise ValueError(f"Backend de OCR desconhecido: {name}")
+        backends.append(BACKENDS[name](**ocr_config["backends"].get(name, {})))
+    min_confidence = ocr_config["min_confidence"]
+    return OCRChain(backends, parse=lambda texto: ler_placa(texto, min_confidence),
+                    hedge_after=ocr_config["hedge_after"])
+# ----------------------------------------------------------------
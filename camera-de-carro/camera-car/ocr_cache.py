@@ -0,0 +1,114 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from plate_parser import PlateMatch
+
+
+# ---------------------- Cache de leituras por hash perceptual ----------------------
+# Carro parado na cancela gera recortes quase iguais, mas nunca idênticos byte
+# a byte, então um hash exato do arquivo (como o SHA-256 do index.js) não
+# acerta. Aqui a chave é a câmera mais um dHash de 256 bits (16x16) do recorte
+# processado: recortes da mesma câmera cujo hash difere em até "max_distance"
+# bits reaproveitam a leitura anterior. Dois carros parecidos em câmeras
+# diferentes nunca se confundem, e o hash fino separa carros parecidos na
+# mesma faixa quando o localizador cai no recorte do carro inteiro.
+# Quem chama só guarda leituras confiáveis: uma leitura fraca no cache se
+# repetiria nos recortes seguintes e viraria maioria na votação.
+# O cache é limitado em tamanho (LRU) e em idade (TTL), e pode ser gravado em
+# JSON para sobreviver a reinícios.
+def dhash(image, size=16):
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class OCRCache:
+    def __init__(self, max_entries=512, ttl=600.0, max_distance=16, path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.path = path
+        self.entries = OrderedDict()  # (câmera, hash) -> (PlateMatch, instante), mais recente no fim
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            self._load()
+
+    def _expire(self, now):
+        # A ordem é de uso (LRU), não de idade: um acerto leva a entrada para o
+        # fim sem renovar o instante, então a idade é conferida em todas
+        stale = [key for key, (_, stored) in self.entries.items() if now - stored > self.ttl]
+        for key in stale:
+            del self.entries[key]
+
+    def get(self, image, camera=None):
+        # Devolve (PlateMatch, chave) do recorte mais parecido da mesma câmera, ou (None, chave)
+        key = (camera, dhash(image))
+        now = time.time()
+        with self.lock:
+            self._expire(now)
+            best, best_distance = None, self.max_distance + 1
+            for stored_key in self.entries:
+                if stored_key[0] != camera:
+                    continue
+                distance = hamming(key[1], stored_key[1])
+                if distance < best_distance:
+                    best, best_distance = stored_key, distance
+                    if distance == 0:
+                        break
+            if best is None:
+                self.misses += 1
+                return None, key
+            self.entries.move_to_end(best)
+            self.hits += 1
+            return self.entries[best][0], key
+
+    def put(self, key, match):
+        with self.lock:
+            self.entries[key] = (match, time.time())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[DEBUG] Cache de OCR: não foi possível ler {self.path} ({e})")
+            return
+        now = time.time()
+        for entry in stored:
+            if len(entry) != 4:
+                continue  # formato antigo (hash de 64 bits, sem câmera): descartado
+            camera, key, match, stored_at = entry
+            if now - stored_at <= self.ttl:
+                self.entries[(camera, int(key, 16))] = (PlateMatch(*match), stored_at)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def save(self):
+        if not self.path:
+            return
+        with self.lock:
+            self._expire(time.time())
+            stored = [[camera, f"{key:064x}", list(match), stored_at]
+                      for (camera, key), (match, stored_at) in self.entries.items()]
+        # Grava num temporário e troca, para não deixar um JSON pela metade
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(stored, f)
+        os.replace(tmp_path, self.path)
+# ------------------------------------------------------------------------------------
@@ -0,0 +1,119 @@
+import heapq
+import itertools
+import threading
+
+
+# ---------------------- Fila limitada para o OCR ----------------------
+# Cada item carrega os recortes de um veículo. Com o OCR lento (Bing leva
+# minutos por placa) uma fila sem limite cresce a noite toda. Esta fila tem
+# tamanho máximo e atende primeiro a maior prioridade (ex.: câmera da
+# entrada); empatadas, a mais antiga. Cheia, aplica a política configurada:
+#   "drop_oldest":         descarta o item mais antigo de menor prioridade
+#   "drop_lowest_quality": descarta o item de menor nota de menor prioridade
+# Não há política de juntar itens do mesmo veículo: o rastreador já envia
+# exatamente um item por trilha (track.sent), então não há o que juntar.
+# O item novo também concorre ao descarte: se ele é o pior, é ele que sai.
+# "on_drop" recebe cada item descartado (para devolver os buffers dos recortes).
+POLICIES = ("drop_oldest", "drop_lowest_quality")
+
+
+class _Entry:
+    __slots__ = ("priority", "order", "quality", "item", "removed")
+
+    def __init__(self, priority, order, quality, item):
+        self.priority = priority
+        self.order = order
+        self.quality = quality
+        self.item = item
+        self.removed = False
+
+    def __lt__(self, other):
+        return (-self.priority, self.order) < (-other.priority, other.order)
+
+
+class OCRQueue:
+    def __init__(self, maxsize=32, policy="drop_oldest", on_drop=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Política da fila de OCR desconhecida: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.on_drop = on_drop
+        self.heap = []
+        self.size = 0
+        self.order = itertools.count()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.enqueued = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def _victim(self, new):
+        # Menor prioridade primeiro; dentro dela, a mais antiga ou a de menor nota
+        live = [entry for entry in self.heap if not entry.removed] + [new]
+        if self.policy == "drop_lowest_quality":
+            return min(live, key=lambda e: (e.priority, e.quality, e.order))
+        return min(live, key=lambda e: (e.priority, e.order))
+
+    def _drop(self, item):
+        if self.on_drop is not None:
+            self.on_drop(item)
+
+    def _remove(self, entry):
+        entry.removed = True
+        self._drop(entry.item)
+        entry.item = None  # libera os recortes já na remoção
+        self.size -= 1
+        # Entradas removidas saem do heap quando chegam ao topo; compacta se acumularem
+        if len(self.heap) > 2 * self.maxsize:
+            self.heap = [e for e in self.heap if not e.removed]
+            heapq.heapify(self.heap)
+
+    def put(self, item, priority=0, quality=0.0):
+        # Nunca bloqueia quem chama (o loop das câmeras); devolve False se o item foi descartado
+        with self.cond:
+            entry = _Entry(priority, next(self.order), quality, item)
+            if self.size >= self.maxsize:
+                victim = self._victim(entry)
+                self.dropped += 1
+                if victim is entry:
+                    print(f"[DEBUG] Fila de OCR cheia ({self.size}, {self.policy}): item novo descartado")
+                    self._drop(item)
+                    return False
+                self._remove(victim)
+                print(f"[DEBUG] Fila de OCR cheia ({self.maxsize}, {self.policy}): item na fila descartado")
+            heapq.heappush(self.heap, entry)
+            self.size += 1
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, self.size)
+            self.cond.notify()
+            return True
+
+    def get(self):
+        # Bloqueia até haver item; devolve None depois de close() e da fila esvaziar
+        with self.cond:
+            while True:
+                while self.heap and self.heap[0].removed:
+                    heapq.heappop(self.heap)
+                if self.heap:
+                    entry = heapq.heappop(self.heap)
+                    self.size -= 1
+                    return entry.item
+                if self.closed:
+                    return None
+                self.cond.wait()
+
+    def close(self):
+        # Sem novos itens; o worker termina depois de processar o que restou
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def qsize(self):
+        with self.cond:
+            return self.size
+
+    def stats(self):
+        with self.cond:
+            return {"depth": self.size, "max_depth": self.max_depth, "enqueued": self.enqueued,
+                    "dropped": self.dropped}
+# ----------------------------------------------------------------------
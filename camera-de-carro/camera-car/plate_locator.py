@@ -0,0 +1,162 @@
+import cv2
+import numpy as np
+
+from detector import letterbox, OnnxDetector
+
+
+# ---------------------- Localização da placa dentro do carro ----------------------
+# O recorte do carro tem dezenas de milhares de pixels que não são placa. Antes
+# do pré-processamento e do OCR procuramos só a região da placa:
+#   "morphology": procura uma fileira de caracteres (ver _locate_morphology)
+#   "onnx":       um detector de placas pequeno (yolov5 de uma classe exportado
+#                 para ONNX), rodando no recorte do carro
+# Quem chama deve voltar ao recorte do carro inteiro quando a região da placa
+# não der leitura (ver plate_regions): uma caixa errada não pode ser a única
+# tentativa.
+class PlateLocator:
+    def __init__(self, method="morphology", weights=None, conf=0.3, size=320,
+                 widths=(640, 320, 160), min_score=0.5, margin=0.15):
+        self.method = method
+        self.widths = widths
+        self.min_score = min_score
+        self.margin = margin
+        self.size = size
+        self.detector = None
+        if method == "onnx":
+            self.detector = OnnxDetector(weights, conf=conf, classes=(0,), size=size, warmup=1)
+        elif method != "morphology":
+            raise ValueError(f"Método de localização de placa desconhecido: {method}")
+
+    def locate(self, car):
+        # Devolve (x1, y1, x2, y2) da placa no recorte do carro, ou None
+        h, w = car.shape[:2]
+        if h < 16 or w < 16:
+            return None
+        if self.detector is not None:
+            box = self._locate_onnx(car)
+        else:
+            box = self._locate_morphology(car)
+        if box is None:
+            return None
+
+        # Margem para não cortar caracteres das bordas
+        x1, y1, x2, y2 = box
+        mx = (x2 - x1) * self.margin
+        my = (y2 - y1) * self.margin
+        return (max(0, int(x1 - mx)), max(0, int(y1 - my)),
+                min(w, int(x2 + mx)), min(h, int(y2 + my)))
+
+    def crop(self, car):
+        box = self.locate(car)
+        if box is None:
+            return None, None
+        x1, y1, x2, y2 = box
+        return car[y1:y2, x1:x2], box
+
+    def _locate_onnx(self, car):
+        image, ratio, (pad_x, pad_y) = letterbox(car, self.size)
+        preds = self.detector.detect([cv2.cvtColor(image, cv2.COLOR_BGR2RGB)])[0]
+        if len(preds) == 0:
+            return None
+        x1, y1, x2, y2 = preds[0, :4]
+        return ((x1 - pad_x) / ratio, (y1 - pad_y) / ratio,
+                (x2 - pad_x) / ratio, (y2 - pad_y) / ratio)
+
+    def _locate_morphology(self, car):
+        # O tamanho da placa no recorte varia muito (carro inteiro, metade de
+        # baixo, recorte justo na placa), então os parâmetros ficam em pixels
+        # de caractere e a busca roda em algumas larguras do recorte; vale a
+        # fileira com a maior nota entre todas as escalas.
+        h, w = car.shape[:2]
+        gray = cv2.cvtColor(car, cv2.COLOR_BGR2GRAY) if car.ndim == 3 else car
+        widths = [width for width in self.widths if width <= 2 * w]
+        if not widths:
+            return None
+        base_width = max(widths)
+        base = cv2.resize(gray, (base_width, max(1, round(h * base_width / w))),
+                          interpolation=cv2.INTER_AREA if base_width < w else cv2.INTER_LINEAR)
+        best, best_score = None, self.min_score
+        for width in sorted(widths, reverse=True):
+            scale = width / w
+            small = base if width == base_width else cv2.resize(
+                base, (width, max(1, round(h * scale))), interpolation=cv2.INTER_AREA)
+            for score, (x1, y1, x2, y2) in _character_rows(small):
+                if score > best_score:
+                    best, best_score = (x1 / scale, y1 / scale, x2 / scale, y2 / scale), score
+        return best
+
+
+# Caracteres de placa depois do redimensionamento: entre 8 e 60 px de altura
+CHAR_MIN_HEIGHT = 8
+CHAR_MAX_HEIGHT = 60
+THRESHOLD_BLOCK = 25  # vizinhança do limiar adaptativo, maior que a largura de um traço
+
+
+def _character_rows(gray):
+    # Caracteres escuros sobre o fundo claro da placa viram componentes
+    # isolados, de altura parecida e lado a lado. As pedras do calçamento, a
+    # grade e a lataria formam malhas ou borrões que não passam nesses testes.
+    # Devolve [(nota, caixa)] de cada fileira de 4 a 10 caracteres.
+    binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV,
+                                   THRESHOLD_BLOCK, 15)
+    _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    chars = []
+    for x, y, cw, ch, area in stats[1:]:
+        if (CHAR_MIN_HEIGHT <= ch <= CHAR_MAX_HEIGHT and 1.0 <= ch / cw <= 5.0
+                and 0.15 <= area / (cw * ch) <= 0.9):
+            chars.append((int(x), int(y), int(cw), int(ch)))
+    chars.sort()
+
+    # Junta vizinhos na mesma linha: altura parecida, centros alinhados e
+    # espaço entre eles menor que a altura de um caractere
+    parent = list(range(len(chars)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, (x1, y1, w1, h1) in enumerate(chars):
+        for j in range(i + 1, len(chars)):
+            x2, y2, w2, h2 = chars[j]
+            if x2 - (x1 + w1) > CHAR_MAX_HEIGHT:
+                break  # ordenados por x: os próximos estão ainda mais longe
+            tallest = max(h1, h2)
+            if (tallest / min(h1, h2) <= 1.5 and abs((y1 + h1 / 2) - (y2 + h2 / 2)) <= 0.4 * tallest
+                    and x2 - (x1 + w1) <= tallest):
+                parent[root(i)] = root(j)
+
+    rows = {}
+    for i, char in enumerate(chars):
+        rows.setdefault(root(i), []).append(char)
+
+    found = []
+    for row in rows.values():
+        if not 4 <= len(row) <= 10:
+            continue
+        x1 = min(c[0] for c in row)
+        y1 = min(c[1] for c in row)
+        x2 = max(c[0] + c[2] for c in row)
+        y2 = max(c[1] + c[3] for c in row)
+        ink = binary[y1:y2, x1:x2] > 0
+        if ink.all():
+            continue
+        region = gray[y1:y2, x1:x2]
+        background, strokes = float(region[~ink].mean()), float(region[ink].mean())
+        # Nota: quantos caracteres (até os 7 da placa) x altura uniforme x contraste do texto
+        heights = np.array([c[3] for c in row], dtype=np.float32)
+        uniformity = max(0.0, 1.0 - 2.0 * float(heights.std() / heights.mean()))
+        contrast = max(0.0, (background - strokes) / max(background, 1.0))
+        found.append((min(len(row), 7) / 7 * uniformity * contrast, (x1, y1, x2, y2)))
+    return found
+
+
+def plate_regions(car, locator):
+    # Regiões a ler, na ordem: a placa localizada e, se ela não der leitura, o carro inteiro
+    if locator is not None:
+        plate, _ = locator.crop(car)
+        if plate is not None:
+            yield plate, True
+    yield car, False
+# ------------------------------------------------------------------------------------
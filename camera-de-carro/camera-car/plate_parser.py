@@ -0,0 +1,106 @@
+import re
+from collections import namedtuple
+
+
+# ---------------------- Validação de placas brasileiras ----------------------
+# Formatos aceitos (os mesmos do placaRegex do index.js):
+#   antigo:   AAA9999  (ex.: ABC1234, escrita ABC-1234)
+#   mercosul: AAA9A99  (ex.: ABC1D23)
+# Cada posição tem um tipo fixo (L = letra, D = dígito). Um caractere do tipo
+# errado é corrigido pelas confusões típicas do OCR (O/0, I/1, B/8, S/5, ...)
+# e cada correção reduz a confiança do candidato. Entre todas as janelas de 7
+# caracteres do texto vence a de maior confiança.
+FORMATS = {
+    "mercosul": "LLLDLDD",
+    "antigo": "LLLDDDD",
+}
+
+# Letra lida no lugar de dígito e vice-versa
+_AS_DIGIT = str.maketrans("OQDIJLBSZG", "0001118526")
+_AS_LETTER = str.maketrans("01852674", "OIBSZGTA")
+
+_TOKEN_PATTERN = re.compile(r"[A-Z0-9]+")
+
+CORRECTION_PENALTY = 0.15   # por caractere corrigido
+JOIN_PENALTY = 0.05         # placa montada juntando dois tokens fora do padrão 3 + 4
+EXTRA_PENALTY = 0.05        # por caractere que sobra no token além da placa
+
+PlateMatch = namedtuple("PlateMatch", "plate format confidence corrections")
+
+
+def _fit(window, layout):
+    # Encaixa 7 caracteres num formato; devolve (placa, correções) ou None
+    chars = []
+    corrections = 0
+    for char, kind in zip(window, layout):
+        if kind == "L":
+            fixed = char if char.isalpha() else char.translate(_AS_LETTER)
+            ok = fixed.isalpha()
+        else:
+            fixed = char if char.isdigit() else char.translate(_AS_DIGIT)
+            ok = fixed.isdigit()
+        if not ok:
+            return None
+        corrections += fixed != char
+        chars.append(fixed)
+    return "".join(chars), corrections
+
+
+def _candidates(text):
+    # (trecho, penalidade) para cada token e cada par de tokens vizinhos;
+    # "ABC-1234" e "ABC 1D23" se separam em 3 + 4 e juntam sem penalidade
+    tokens = _TOKEN_PATTERN.findall(text)
+    for token in tokens:
+        yield token, 0.0
+    for first, second in zip(tokens, tokens[1:]):
+        natural = len(first) == 3 and len(second) == 4
+        yield first + second, 0.0 if natural else JOIN_PENALTY
+
+
+def parse_plate(text):
+    # Devolve o PlateMatch mais confiável encontrado no texto, ou None
+    if not text:
+        return None
+    best = None
+    for chunk, penalty in _candidates(text.upper()):
+        if len(chunk) < 7:
+            continue
+        extra = (len(chunk) - 7) * EXTRA_PENALTY
+        for start in range(len(chunk) - 6):
+            window = chunk[start:start + 7]
+            for name, layout in FORMATS.items():
+                fitted = _fit(window, layout)
+                if fitted is None:
+                    continue
+                plate, corrections = fitted
+                confidence = 1.0 - corrections * CORRECTION_PENALTY - penalty - extra
+                if best is None or confidence > best.confidence:
+                    best = PlateMatch(plate, name, round(max(confidence, 0.0), 3), corrections)
+    return best
+
+
+def vote_plates(matches):
+    # Junta várias leituras do mesmo veículo: em cada posição vence o
+    # caractere com mais confiança somada. O resultado precisa continuar num
+    # formato válido; a confiança é a concordância média ponderada.
+    matches = [m for m in matches if m is not None]
+    if not matches:
+        return None
+    if len(matches) == 1:
+        return matches[0]
+    total = sum(m.confidence for m in matches) or 1.0
+    chars = []
+    agreement = 0.0
+    for position in range(7):
+        weights = {}
+        for m in matches:
+            weights[m.plate[position]] = weights.get(m.plate[position], 0.0) + m.confidence
+        char, weight = max(weights.items(), key=lambda item: item[1])
+        chars.append(char)
+        agreement += weight / total
+    voted = parse_plate("".join(chars))
+    if voted is None:
+        return max(matches, key=lambda m: m.confidence)
+    return PlateMatch(voted.plate, voted.format, round(agreement / 7 * voted.confidence, 3),
+                      voted.corrections)
+# ------------------------------------------------------------------------------
@@ -0,0 +1,174 @@
+import sqlite3
+import argparse
+
+from storage import COLUMNS
+
+
+# ---------------------- Consultas ao banco de leituras ----------------------
+# Todas as consultas usam os índices de storage.py e paginam por cursor
+# (keyset): a próxima página começa depois do (capturado_em, id) da última
+# linha, então o custo não cresce com o número da página nem com o tamanho
+# do banco. Resultados do mais recente para o mais antigo.
+# Exceção: a busca por prefixo ("ABC*") sai em ordem de placa e, em cada
+# placa, da passagem mais antiga para a mais nova. É a ordem do índice
+# (placa, capturado_em): ordenar por data todas as placas do prefixo
+# exigiria ordenar em memória cada linha encontrada antes da primeira página.
+FIELDS = ("id",) + COLUMNS
+
+
+def connect_readonly(path="registros.db"):
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=30.0)
+    connection.row_factory = sqlite3.Row
+    return connection
+
+
+def normalizar_placa(placa):
+    return placa.replace("-", "").replace(" ", "").upper()
+
+
+def _limite_fim(fim):
+    # "2025-03-21" como fim inclui o dia inteiro
+    return f"{fim} 23:59:59" if fim and len(fim) == 10 else fim
+
+
+def encode_cursor(row, por_placa=False):
+    if por_placa:
+        return f"{row['placa']}|{row['capturado_em']}|{row['id']}"
+    return f"{row['capturado_em']}|{row['id']}"
+
+
+def decode_cursor(cursor, por_placa=False):
+    if por_placa:
+        placa, capturado_em, row_id = cursor.split("|")
+        return placa, capturado_em, int(row_id)
+    capturado_em, row_id = cursor.rsplit("|", 1)
+    return capturado_em, int(row_id)
+
+
+def _fim_prefixo(prefixo):
+    # Primeiro texto depois de todas as placas que começam com o prefixo: "AB" -> "AC"
+    return prefixo[:-1] + chr(ord(prefixo[-1]) + 1)
+
+
+def buscar(connection, placa=None, camera=None, inicio=None, fim=None, somente_placas=False,
+           limite=50, cursor=None):
+    # Devolve (linhas, cursor da próxima página ou None)
+    conditions, params = [], []
+    prefixo = None
+    if placa:
+        placa = normalizar_placa(placa)
+        if placa.endswith("*"):
+            # Prefixo ("ABC*") como intervalo explícito no índice da placa; com
+            # o cursor o início do intervalo vem da própria linha do cursor
+            prefixo = placa.rstrip("*")
+            if not cursor:
+                conditions.append("placa >= ?")
+                params.append(prefixo)
+            if prefixo:
+                conditions.append("placa < ?")
+                params.append(_fim_prefixo(prefixo))
+        else:
+            conditions.append("placa = ?")
+            params.append(placa)
+    elif somente_placas:
+        conditions.append("placa IS NOT NULL")
+    if camera:
+        conditions.append("camera = ?")
+        params.append(camera)
+    if inicio:
+        conditions.append("capturado_em >= ?")
+        params.append(inicio)
+    if fim:
+        conditions.append("capturado_em <= ?")
+        params.append(_limite_fim(fim))
+    por_placa = prefixo is not None
+    if cursor and por_placa:
+        conditions.append("(placa, capturado_em, id) > (?, ?, ?)")
+        params.extend(decode_cursor(cursor, por_placa))
+    elif cursor:
+        conditions.append("(capturado_em, id) < (?, ?)")
+        params.extend(decode_cursor(cursor))
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    if por_placa:
+        # INDEXED BY: com filtro de câmera o planejador preferiria o índice da
+        # câmera e ordenaria tudo em memória
+        source, order = "leituras INDEXED BY idx_leituras_placa", "placa, capturado_em, id"
+    else:
+        source, order = "leituras", "capturado_em DESC, id DESC"
+    sql = f"SELECT {', '.join(FIELDS)} FROM {source} {where} ORDER BY {order} LIMIT ?"
+    rows = connection.execute(sql, params + [limite + 1]).fetchall()
+    next_cursor = encode_cursor(rows[limite - 1], por_placa) if len(rows) > limite else None
+    return rows[:limite], next_cursor
+
+
+def historico_placa(connection, placa, inicio=None, fim=None, limite=50, cursor=None):
+    return buscar(connection, placa=placa, inicio=inicio, fim=fim, limite=limite, cursor=cursor)
+
+
+def por_camera(connection, camera, inicio=None, fim=None, limite=50, cursor=None):
+    return buscar(connection, camera=camera, inicio=inicio, fim=fim, limite=limite, cursor=cursor)
+
+
+def por_intervalo(connection, inicio, fim, somente_placas=True, limite=50, cursor=None):
+    return buscar(connection, inicio=inicio, fim=fim, somente_placas=somente_placas,
+                  limite=limite, cursor=cursor)
+
+
+def ultima_vez(connection, placa):
+    if placa.endswith("*"):
+        raise ValueError("A última passagem é de uma placa exata, sem prefixo")
+    rows, _ = buscar(connection, placa=placa, limite=1)
+    return rows[0] if rows else None
+# -----------------------------------------------------------------------------
+
+
+def _print_rows(rows, next_cursor):
+    for row in rows:
+        confianca = f"{row['confianca']:.2f}" if row["confianca"] is not None else "-"
+        print(f"{row['capturado_em']}  {row['camera'] or '-':<10} {row['placa'] or '(sem leitura)':<10} "
+              f"{confianca:>5}  {row['backend'] or '-':<12} {row['imagem'] or ''}")
+    if not rows:
+        print("Nenhuma leitura encontrada.")
+    if next_cursor:
+        print(f"\nPróxima página: --cursor \"{next_cursor}\"")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consulta o histórico de leituras de placas")
+    parser.add_argument("--db", default="registros.db", help="arquivo do banco SQLite")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    def paginated(command, help_text):
+        p = sub.add_parser(command, help=help_text)
+        p.add_argument("--desde", help="início, ex.: 2025-03-21 ou '2025-03-21 08:00'")
+        p.add_argument("--ate", help="fim (uma data sozinha inclui o dia inteiro)")
+        p.add_argument("--limite", type=int, default=50, help="linhas por página")
+        p.add_argument("--cursor", help="continua a partir da página anterior")
+        return p
+
+    paginated("placa", "passagens de uma placa; prefixo (ABC*) lista por placa, "
+                       "da passagem mais antiga para a mais nova").add_argument("placa")
+    paginated("camera", "leituras de uma câmera").add_argument("camera")
+    paginated("intervalo", "placas lidas num intervalo").add_argument(
+        "--todas", action="store_true", help="inclui veículos sem placa lida")
+    sub.add_parser("ultima", help="última passagem de uma placa").add_argument("placa")
+    args = parser.parse_args()
+
+    connection = connect_readonly(args.db)
+    if args.comando == "ultima":
+        if args.placa.endswith("*"):
+            parser.error("ultima aceita só placa exata; para prefixo use: placa ABC*")
+        row = ultima_vez(connection, args.placa)
+        _print_rows([row] if row else [], None)
+    elif args.comando == "placa":
+        _print_rows(*historico_placa(connection, args.placa, args.desde, args.ate, args.limite, args.cursor))
+    elif args.comando == "camera":
+        _print_rows(*por_camera(connection, args.camera, args.desde, args.ate, args.limite, args.cursor))
+    else:
+        _print_rows(*por_intervalo(connection, args.desde, args.ate, not args.todas, args.limite, args.cursor))
+    connection.close()
+
+
+if __name__ == "__main__":
+    main()
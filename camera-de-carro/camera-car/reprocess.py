@@ -0,0 +1,194 @@
+import os
+import json
+import time
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED, ALL_COMPLETED
+
+import cv2
+import numpy as np
+
+from config import load_config
+from archive import SegmentArchive
+from preprocess import PROFILES, preprocess
+from plate_locator import PlateLocator, plate_regions
+
+
+# ---------------------- Reprocessamento em lote ----------------------
+# Roda de novo o OCR sobre recortes já arquivados: segmentos do archive.py ou
+# uma pasta de PNGs antigos. O archive.py guarda o recorte do carro inteiro,
+# então cada recorte passa pelo mesmo caminho do main.py: localiza a placa,
+# aplica o perfil de pré-processamento e, sem leitura válida na placa, tenta
+# o carro inteiro. Arquivos antigos, que já guardavam a placa recortada e
+# pré-processada, pedem --sem-localizador e --preprocess nenhum.
+# O processo principal lê os recortes em sequência e os distribui num pool de
+# processos, cada um com a própria cadeia de OCR. Cada resultado é acrescentado
+# na hora ao JSON Lines de saída ({"arquivo": ..., "placas": [...]}, como o
+# resultados.json do project-test), que também serve de checkpoint: rodar de
+# novo com a mesma saída pula o que já foi processado.
+_chain = None
+_profile = None
+_locator = None
+
+
+def _init_worker(ocr_config, profile, locator_config):
+    global _chain, _profile, _locator
+    from ocr import build_ocr_chain
+
+    _chain = build_ocr_chain(ocr_config)
+    _profile = profile
+    if locator_config is not None:
+        _locator = PlateLocator(locator_config["method"], locator_config.get("weights"),
+                                locator_config["conf"], locator_config["size"])
+
+
+def _process(key, data):
+    # Qualquer falha vira um resultado com "erro": uma exceção subiria pelo
+    # future.result() e derrubaria a execução inteira (e cada retomada)
+    try:
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+        if image is None:
+            return {"arquivo": key, "placas": [], "erro": "imagem ilegível"}
+        match, backend_name = None, None
+        for region, _ in plate_regions(image, _locator):
+            if _profile:
+                region, _ = preprocess(region, _profile)
+            match, backend_name = _chain.read(region)
+            if match is not None:
+                break
+    except Exception as e:
+        return {"arquivo": key, "placas": [], "erro": str(e)}
+    if match is None:
+        return {"arquivo": key, "placas": []}
+    return {"arquivo": key, "placas": [match.plate], "confianca": match.confidence, "backend": backend_name}
+
+
+def archive_items(directory, prefix=None):
+    archive = SegmentArchive(directory)
+    try:
+        for segment in archive.segments():
+            if prefix and not segment.startswith(prefix):
+                continue
+            for event_id in archive._index(segment):
+                yield event_id, lambda event_id=event_id: archive.read_bytes(event_id)
+    finally:
+        archive.close()
+
+
+def folder_items(directory, prefix=None):
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith((".png", ".jpg", ".jpeg", ".webp", ".bmp")):
+            continue
+        if prefix and not name.startswith(prefix):
+            continue
+        path = os.path.join(directory, name)
+
+        def read(path=path):
+            with open(path, "rb") as f:
+                return f.read()
+        yield name, read
+
+
+def load_checkpoint(output, retry_empty=False):
+    # Chaves já presentes na saída; uma última linha cortada (queda no meio da
+    # escrita) é ignorada e resultados com erro são refeitos. Com retry_empty os
+    # recortes sem placa também (ex.: um backend estava fora do ar).
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            if "erro" in result or (retry_empty and not result.get("placas")):
+                done.discard(result.get("arquivo"))
+                continue
+            done.add(result["arquivo"])
+    return done
+# ----------------------------------------------------------------------
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reprocessa recortes arquivados com a cadeia de OCR")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--arquivo", help="diretório de segmentos (archive.py)")
+    source.add_argument("--imagens", help="diretório com imagens soltas (ex.: placas_detectadas antigo)")
+    parser.add_argument("--saida", default="reprocessamento.jsonl", help="JSON Lines de saída (e checkpoint)")
+    parser.add_argument("--config", default="config.json", help="configuração com os backends de OCR")
+    parser.add_argument("--backends", nargs="+", help="sobrescreve ocr.chain, ex.: tesseract express")
+    parser.add_argument("--preprocess", choices=sorted(PROFILES) + ["nenhum"],
+                        help="perfil aplicado antes do OCR (padrão: preprocess.profile do config); "
+                             "\"nenhum\" para recortes que já foram pré-processados")
+    parser.add_argument("--sem-localizador", action="store_true",
+                        help="lê o recorte como está, sem procurar a placa (recortes que já são só a placa)")
+    parser.add_argument("--prefixo", help="só segmentos/arquivos que começam com isso, ex.: 202503")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="processos de OCR")
+    parser.add_argument("--refazer-vazios", action="store_true",
+                        help="ao retomar, processa de novo os recortes que ficaram sem placa")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    ocr_config = config["ocr"]
+    profile = args.preprocess or config["preprocess"]["profile"]
+    profile = None if profile == "nenhum" else profile
+    locator_config = config["plate_locator"]
+    if args.sem_localizador or not locator_config["enabled"]:
+        locator_config = None
+    if args.backends:
+        ocr_config["chain"] = args.backends
+    # O paralelismo vem dos processos: um Tesseract por processo basta
+    ocr_config["backends"].setdefault("tesseract", {})["workers"] = 1
+
+    done = load_checkpoint(args.saida, args.refazer_vazios)
+    if done:
+        print(f"Retomando: {len(done)} recortes já processados em {args.saida}")
+    if args.arquivo:
+        items = archive_items(args.arquivo, args.prefixo)
+    else:
+        items = folder_items(args.imagens, args.prefixo)
+
+    max_pending = args.workers * 4  # limita os recortes lidos e ainda não processados
+    processed = found = reported = 0
+    start = time.perf_counter()
+    pending = set()
+    with open(args.saida, "a", encoding="utf-8") as output, \
+            ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                initargs=(ocr_config, profile, locator_config)) as pool:
+
+        def collect(return_when):
+            nonlocal pending, processed, found, reported
+            finished, pending = wait(pending, return_when=return_when)
+            for future in finished:
+                result = future.result()
+                result["processado_em"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                processed += 1
+                found += bool(result["placas"])
+            output.flush()
+            if processed - reported >= 100:
+                reported = processed
+                rate = processed / (time.perf_counter() - start)
+                print(f"{processed} recortes, {found} placas, {rate:.1f} recortes/s")
+
+        try:
+            for key, read in items:
+                if key in done:
+                    continue
+                pending.add(pool.submit(_process, key, read()))
+                if len(pending) >= max_pending:
+                    collect(FIRST_COMPLETED)
+            collect(ALL_COMPLETED)
+        except KeyboardInterrupt:
+            # O que já foi escrito fica como checkpoint; o resto é refeito na próxima execução
+            print("Interrompido; rode de novo com a mesma --saida para continuar.")
+            pool.shutdown(wait=False, cancel_futures=True)
+            return
+
+    elapsed = time.perf_counter() - start
+    print(f"Concluído: {processed} recortes em {elapsed:.0f}s, {found} com placa -> {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
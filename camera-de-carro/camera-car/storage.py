@@ -0,0 +1,172 @@
+import os
+import re
+import sqlite3
+import threading
+import argparse
+from queue import Queue, Empty
+from datetime import datetime
+
+from plate_parser import parse_plate
+
+
+# ---------------------- Registro das leituras em SQLite ----------------------
+# Cada veículo enviado ao OCR vira uma linha em "leituras" (placa NULL quando
+# o OCR não leu nada). O banco fica em modo WAL: uma thread própria grava em
+# lotes, numa transação por lote, e as consultas leem ao mesmo tempo sem
+# esperar a gravação. Quem registra só coloca o evento numa fila.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leituras (
+    id INTEGER PRIMARY KEY,
+    capturado_em TEXT NOT NULL,      -- 'YYYY-MM-DD HH:MM:SS', hora local
+    camera TEXT,
+    camera_numero INTEGER,
+    trilha INTEGER,
+    placa TEXT,
+    confianca REAL,
+    backend TEXT,
+    imagem TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_leituras_placa ON leituras (placa, capturado_em);
+CREATE INDEX IF NOT EXISTS idx_leituras_camera ON leituras (camera, capturado_em);
+CREATE INDEX IF NOT EXISTS idx_leituras_capturado ON leituras (capturado_em);
+CREATE TABLE IF NOT EXISTS importacoes (
+    arquivo TEXT PRIMARY KEY,
+    linhas INTEGER NOT NULL,
+    importado_em TEXT NOT NULL
+);
+"""
+
+COLUMNS = ("capturado_em", "camera", "camera_numero", "trilha", "placa", "confianca", "backend", "imagem")
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+INSERT = f"INSERT INTO leituras ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+
+def connect(path):
+    connection = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")  # seguro em WAL; sincroniza no checkpoint
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def format_timestamp(when):
+    if isinstance(when, (int, float)):
+        when = datetime.fromtimestamp(when)
+    return when.strftime(TIMESTAMP_FORMAT)
+
+
+class EventStore:
+    def __init__(self, path="registros.db", batch_size=100, flush_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = Queue()
+        self.written = 0
+        connect(path).close()  # cria o schema antes de aceitar eventos
+        self.thread = threading.Thread(target=self._run, name="storage", daemon=True)
+        self.thread.start()
+
+    def record(self, capturado_em, camera=None, camera_numero=None, trilha=None, placa=None,
+               confianca=None, backend=None, imagem=None):
+        # Não bloqueia: o evento é gravado no próximo lote
+        self.queue.put((format_timestamp(capturado_em), camera, camera_numero, trilha, placa,
+                        confianca, backend, imagem))
+
+    def _run(self):
+        connection = connect(self.path)
+        running = True
+        while running:
+            try:
+                batch = [self.queue.get(timeout=self.flush_interval)]
+            except Empty:
+                continue
+            # Junta o que já estiver na fila num único lote
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = [row for row in batch if row is not None]
+            if not batch:
+                continue
+            try:
+                with connection:
+                    connection.executemany(INSERT, batch)
+                self.written += len(batch)
+            except sqlite3.Error as e:
+                print(f"[DEBUG] Registro: falha ao gravar {len(batch)} leituras ({e})")
+        connection.close()
+
+    def close(self):
+        # Grava o que ainda está na fila e encerra a thread
+        self.queue.put(None)
+        self.thread.join()
+# ------------------------------------------------------------------------------
+
+
+# ---------------------- Importação dos CSVs antigos ----------------------
+# registros_carros.csv (Data,Hora,Camera,Imagem) e registros_placas.csv /
+# placas_detectadas.csv (Data,Hora,Placa). Gravações não atômicas deixaram
+# linhas grudadas ("...png2025-03-18,11:34:03,..."), então as linhas são
+# separadas pelo início "data,hora," e não pela quebra de linha. A placa passa
+# pelo parse_plate (o CSV tem lixo como "entrada"); o que não é placa vira NULL.
+# Cada arquivo é importado uma única vez (tabela "importacoes").
+ROW_START = re.compile(r"(\d{4}-\d{2}-\d{2}),(\d{2}:\d{2}:\d{2}),")
+CAMERA_NUMBER = re.compile(r"(\d+)\s*$")
+
+
+def _csv_rows(text):
+    starts = list(ROW_START.finditer(text))
+    for match, following in zip(starts, starts[1:] + [None]):
+        end = following.start() if following else len(text)
+        rest = text[match.end():end].strip().split(",")
+        yield f"{match.group(1)} {match.group(2)}", [field.strip() for field in rest]
+
+
+def import_csv(connection, path):
+    name = os.path.abspath(path)
+    if connection.execute("SELECT 1 FROM importacoes WHERE arquivo = ?", (name,)).fetchone():
+        print(f"{path}: já importado")
+        return 0
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        header = f.readline().strip().split(",")
+        text = f.read()
+
+    rows = []
+    for captured, fields in _csv_rows(text):
+        if "Camera" in header:
+            camera = fields[0] if fields else None
+            number = CAMERA_NUMBER.search(camera or "")
+            image = fields[1].replace("\\", "/") if len(fields) > 1 else None
+            rows.append((captured, camera, int(number.group(1)) if number else None,
+                         None, None, None, "csv", image))
+        else:
+            match = parse_plate(fields[0]) if fields else None
+            rows.append((captured, None, None, None, match.plate if match else None,
+                         match.confidence if match else None, "csv", None))
+
+    with connection:
+        connection.executemany(INSERT, rows)
+        connection.execute("INSERT INTO importacoes VALUES (?, ?, ?)",
+                           (name, len(rows), format_timestamp(datetime.now())))
+    print(f"{path}: {len(rows)} linhas importadas")
+    return len(rows)
+# ------------------------------------------------------------------------
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa os CSVs antigos para o banco de leituras")
+    parser.add_argument("csvs", nargs="+", help="arquivos registros_carros.csv / registros_placas.csv")
+    parser.add_argument("--db", default="registros.db", help="arquivo do banco SQLite")
+    args = parser.parse_args()
+
+    connection = connect(args.db)
+    for path in args.csvs:
+        import_csv(connection, path)
+    connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import itertools
+
+import numpy as np
+
+
+# ---------------------- Rastreamento de veículos ----------------------
+def iou_matrix(a, b):
+    # IoU entre todas as caixas de a (N, 4) e b (M, 4), em x1, y1, x2, y2
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return inter / np.maximum(union, 1e-6)
+
+
+_track_ids = itertools.count(1)
+
+
+class Track:
+    # Estado de um veículo: caixa filtrada com velocidade constante (filtro
+    # alfa-beta sobre o centro) e os "top_k" melhores recortes vistos até agora
+    def __init__(self, box, conf, now, top_k=3):
+        self.id = next(_track_ids)
+        box = np.asarray(box, dtype=np.float32)
+        self.center = (box[:2] + box[2:]) / 2
+        self.size = box[2:] - box[:2]
+        self.velocity = np.zeros(2, dtype=np.float32)
+        self.first_seen = now
+        self.last_seen = now
+        self.hits = 1
+        self.conf = conf
+        self.top_k = top_k
+        self.candidates = []  # (score, recorte, caixa, instante), melhor primeiro
+        self.sent = False
+
+    def predict(self, now):
+        center = self.center + self.velocity * (now - self.last_seen)
+        half = self.size / 2
+        return np.concatenate([center - half, center + half])
+
+    def update(self, box, conf, now, alpha=0.6, beta=0.2):
+        box = np.asarray(box, dtype=np.float32)
+        dt = max(now - self.last_seen, 1e-3)
+        predicted = self.center + self.velocity * dt
+        residual = (box[:2] + box[2:]) / 2 - predicted
+        self.center = predicted + alpha * residual
+        self.velocity = self.velocity + beta * residual / dt
+        self.size = self.size + alpha * ((box[2:] - box[:2]) - self.size)
+        self.last_seen = now
+        self.hits += 1
+        self.conf = conf
+
+    def offer(self, score):
+        # True se este recorte entra entre os guardados (quem chama salva o recorte)
+        if self.sent:
+            return False
+        return len(self.candidates) < self.top_k or score > self.candidates[-1][0]
+
+    def remember(self, score, crop, box, now):
+        # crop é um PooledCrop: o recorte que sai da lista devolve o buffer ao pool
+        self.candidates.append((score, crop, tuple(int(v) for v in box), now))
+        self.candidates.sort(key=lambda c: c[0], reverse=True)
+        for _, dropped, _, _ in self.candidates[self.top_k:]:
+            dropped.release()
+        del self.candidates[self.top_k:]
+
+    def discard(self):
+        for _, crop, _, _ in self.candidates:
+            crop.release()
+        self.candidates = []
+
+    def crops(self):
+        # Recortes guardados, do melhor para o pior: [(recorte, caixa), ...]
+        return [(crop, box) for _, crop, box, _ in self.candidates]
+
+
+class VehicleTracker:
+    # Associa as caixas do YOLO a trilhas por IoU contra a posição prevista.
+    # Cada trilha gera no máximo um envio para o OCR: quando some por
+    # "max_age" segundos ou quando fica mais de "max_duration" segundos no ROI
+    # (carro parado na cancela).
+    def __init__(self, iou_threshold=0.3, max_age=2.0, min_hits=2, max_duration=30.0, top_k=3):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.max_duration = max_duration
+        self.top_k = top_k
+        self.tracks = []
+
+    def update(self, boxes, confs, now):
+        # Devolve a trilha associada a cada caixa, na mesma ordem
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        assigned = [None] * len(boxes)
+        if self.tracks and len(boxes):
+            predicted = np.stack([track.predict(now) for track in self.tracks])
+            ious = iou_matrix(predicted, boxes)
+            # Associação gulosa pelos maiores IoU
+            order = np.dstack(np.unravel_index(np.argsort(-ious, axis=None), ious.shape))[0]
+            used_tracks = set()
+            for t, d in order:
+                if ious[t, d] < self.iou_threshold:
+                    break
+                if t in used_tracks or assigned[d] is not None:
+                    continue
+                self.tracks[t].update(boxes[d], float(confs[d]), now)
+                assigned[d] = self.tracks[t]
+                used_tracks.add(t)
+        for d, box in enumerate(boxes):
+            if assigned[d] is None:
+                track = Track(box, float(confs[d]), now, self.top_k)
+                self.tracks.append(track)
+                assigned[d] = track
+        return assigned
+
+    def expire(self, now):
+        # Remove trilhas perdidas e devolve as que devem ir para o OCR agora
+        ready = []
+        alive = []
+        for track in self.tracks:
+            lost = now - track.last_seen > self.max_age
+            confirmed = track.hits >= self.min_hits and bool(track.candidates)
+            if confirmed and not track.sent and (lost or now - track.first_seen > self.max_duration):
+                track.sent = True
+                ready.append(track)
+            elif lost:
+                track.discard()  # libera os recortes de trilhas descartadas
+            if not lost:
+                alive.append(track)
+        self.tracks = alive
+        return ready
+
+    def has_active_tracks(self):
+        return bool(self.tracks)
+# ----------------------------------------------------------------------